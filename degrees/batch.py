@@ -0,0 +1,93 @@
+import csv
+import json
+import multiprocessing
+
+# Graph shared by the worker processes. It is set before the pool is
+# created so that forked workers inherit it copy-on-write instead of
+# receiving a pickled copy.
+graph = None
+search = None
+
+
+def parse_pair(line):
+    """
+    Return the (source, target) pair written on `line`, either as two
+    tab-separated values or as two comma-separated CSV fields.
+    Returns None for blank lines.
+    """
+    line = line.rstrip("\r\n")
+    if not line.strip():
+        return None
+    if "\t" in line:
+        fields = line.split("\t")
+    else:
+        fields = next(csv.reader([line]))
+    if len(fields) != 2:
+        raise ValueError(f"expected a source and a target, got {line!r}")
+    return fields[0].strip(), fields[1].strip()
+
+
+def answer(line):
+    """
+    Compute the result record for one input line.
+    """
+    try:
+        pair = parse_pair(line)
+    except ValueError as e:
+        return {"input": line.rstrip("\r\n"), "error": str(e)}
+    if pair is None:
+        return None
+
+    record = {"source": pair[0], "target": pair[1]}
+    source, error = graph.resolve(pair[0])
+    if error is None:
+        target, error = graph.resolve(pair[1])
+    if error is not None:
+        record["error"] = error
+        return record
+
+    path = search(source, target)
+    if path is None:
+        record["degrees"] = None
+        record["path"] = None
+    else:
+        record["degrees"] = len(path)
+        record["path"] = [[movie_id, person_id] for movie_id, person_id in path]
+    return record
+
+
+def run_batch(sharedGraph, lines, out, processes=None, chunksize=64,
+              bidirectional=True):
+    """
+    Answer every (source, target) pair read from `lines` and write one JSON
+    object per line to `out`, in input order, as results become available.
+
+    Queries are spread over a pool of `processes` forked workers (one per
+    CPU by default) that share the loaded graph read-only.
+    """
+    global graph, search
+    graph = sharedGraph
+    if bidirectional:
+        search = graph.bidirectional_shortest_path
+    else:
+        search = graph.shortest_path
+
+    if processes == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        results = map(answer, lines)
+        _write(results, out)
+        return
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes) as pool:
+        _write(pool.imap(answer, lines, chunksize), out)
+
+
+def _write(results, out):
+    """
+    Write each non-empty result to `out` as a JSON line.
+    """
+    for record in results:
+        if record is None:
+            continue
+        out.write(json.dumps(record) + "\n")
+        out.flush()
@@ -0,0 +1,344 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import batch
+import degrees
+import loader
+import snapshot
+import synthetic
+from graph import Graph
+from landmarks import LandmarkIndex
+
+
+def random_pairs(count, seed=None):
+    """
+    Returns `count` random (source, target) pairs of distinct person_ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    pairs = []
+    for i in range(count):
+        source, target = rng.sample(person_ids, 2)
+        pairs.append((source, target))
+    return pairs
+
+
+def time_search(search, pairs):
+    """
+    Runs `search` over every pair and returns the elapsed seconds
+    together with the list of path lengths (None when not connected)
+    and the latency of every query.
+    """
+    lengths = []
+    latencies = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        queryStart = time.perf_counter()
+        path = search(source, target)
+        latencies.append(time.perf_counter() - queryStart)
+        lengths.append(None if path is None else len(path))
+    return time.perf_counter() - start, lengths, latencies
+
+
+def compare_searches(pairs, graph=None):
+    """
+    Times one-sided BFS against bidirectional BFS on the same pairs and
+    checks that every search reports the same degrees of separation.
+    When `graph` is given its searches are timed as well.
+
+    Returns the timings of every search, keyed by its label.
+    """
+    searches = [
+        ("bfs", degrees.shortest_path),
+        ("bidirectional", degrees.bidirectional_shortest_path),
+    ]
+    results = {}
+    if graph is not None:
+        start = time.perf_counter()
+        index = LandmarkIndex.build(graph)
+        results["landmark index build"] = {"seconds": time.perf_counter() - start}
+        searches += [
+            ("csr bfs", graph.shortest_path),
+            ("csr bidirectional", graph.bidirectional_shortest_path),
+            ("landmark astar", index.shortest_path),
+        ]
+
+    print(f"Pairs: {len(pairs)}")
+    baseTime, baseLengths = None, None
+    for label, search in searches:
+        elapsed, lengths, latencies = time_search(search, pairs)
+        if baseLengths is None:
+            baseTime, baseLengths = elapsed, lengths
+        mismatches = sum(1 for a, b in zip(baseLengths, lengths) if a != b)
+        latencies.sort()
+        results[label] = {
+            "seconds": elapsed,
+            "ms_per_query": elapsed / len(pairs) * 1000,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+            "mismatches": mismatches,
+        }
+        line = f"  {label + ':':<19} {elapsed:.4f}s ({elapsed / len(pairs) * 1000:.3f} ms/query)"
+        if elapsed > 0:
+            line += f", {baseTime / elapsed:.2f}x vs bfs"
+        print(line + f", mismatched lengths: {mismatches}")
+    return results
+
+
+def neighbor_throughput(graph, count, seed=None):
+    """
+    Expands the neighbors of `count` random people with both backends
+    and prints and returns people and edges expanded per second.
+    """
+    rng = random.Random(seed)
+    person_ids = rng.sample(sorted(degrees.people), min(count, len(degrees.people)))
+    indices = [graph.person_index[pid] for pid in person_ids]
+
+    def dict_backend():
+        edges = 0
+        for pid in person_ids:
+            edges += len(degrees.neighbors_for_person(pid))
+        return edges
+
+    def csr_backend():
+        edges = 0
+        for person in indices:
+            for movie in graph.movies_of(person):
+                edges += len(graph.stars_of(movie))
+        return edges
+
+    print(f"Neighbor expansion ({len(person_ids)} people):")
+    results = {}
+    for label, expand in [("dict", dict_backend), ("csr", csr_backend)]:
+        start = time.perf_counter()
+        edges = expand()
+        elapsed = time.perf_counter() - start or 1e-9
+        results[label] = {
+            "people_per_second": len(person_ids) / elapsed,
+            "edges_per_second": edges / elapsed,
+        }
+        print(f"  {label + ':':<5} {len(person_ids) / elapsed:,.0f} people/s, {edges / elapsed:,.0f} edges/s")
+    return results
+
+
+def backend_memory(directory):
+    """
+    Returns the bytes held by the dict backend and by the CSR backend
+    for the dataset in `directory`, as traced by tracemalloc.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+
+    tracemalloc.start()
+    degrees.load_data(directory)
+    dictBytes = tracemalloc.get_traced_memory()[0]
+    graph = Graph.from_dicts(degrees.people, degrees.movies)
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    graphBytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del graph
+    degrees.load_data(directory)
+    return dictBytes, graphBytes
+
+
+def _load_in_child(directory, streaming, results):
+    """
+    Load `directory` with one of the loaders and report its statistics.
+    """
+    if streaming:
+        stats = degrees.load_data_streaming(directory)
+    else:
+        start = time.perf_counter()
+        degrees.load_data(directory)
+        elapsed = time.perf_counter() - start
+        rows = len(degrees.people) + len(degrees.movies) + sum(
+            len(person["movies"]) for person in degrees.people.values()
+        )
+        stats = {
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed if elapsed else 0,
+            "peak_rss_kib": loader.peak_rss_kib(),
+        }
+    results.put(stats)
+
+
+def compare_loaders(directory):
+    """
+    Runs the DictReader and streaming loaders each in a fresh process,
+    so that peak RSS is measured separately, and prints and returns
+    their statistics.
+    """
+    context = multiprocessing.get_context("spawn")
+    print("Loaders:")
+    results = {}
+    for label, streaming in [("dictreader", False), ("streaming", True)]:
+        queue = context.Queue()
+        process = context.Process(
+            target=_load_in_child, args=(directory, streaming, queue)
+        )
+        process.start()
+        stats = queue.get()
+        process.join()
+        results[label] = stats
+        peak = stats["peak_rss_kib"]
+        peak = "unknown" if peak is None else f"{peak / 1024:.1f} MiB"
+        print(f"  {label + ':':<11} {stats['seconds']:.3f}s, "
+              f"{stats['rows_per_second']:,.0f} rows/s, peak RSS {peak}")
+    return results
+
+
+def time_snapshot(directory):
+    """
+    Times building the snapshot from the CSVs and reopening it, leaving
+    the dictionaries loaded as a side effect of the build.
+    """
+    for data in (degrees.names, degrees.people, degrees.movies):
+        data.clear()
+    start = time.perf_counter()
+    degrees.load_graph(directory, rebuild=True)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = degrees.load_graph(directory)
+    reopen = time.perf_counter() - start
+
+    results = {
+        "build_seconds": build,
+        "open_seconds": reopen,
+        "bytes": os.path.getsize(snapshot.snapshot_path(directory)),
+    }
+    print(f"Snapshot: built in {build:.3f}s, reopened in {reopen:.3f}s "
+          f"({results['bytes'] / 2 ** 20:.1f} MiB)")
+    return graph, results
+
+
+def time_batch(graph, pairs, processes):
+    """
+    Times batch mode over `pairs` with each number of worker processes
+    in `processes` and returns queries per second for each.
+    """
+    lines = [f"{source}\t{target}\n" for source, target in pairs]
+    results = {}
+    print("Batch:")
+    for count in processes:
+        start = time.perf_counter()
+        batch.run_batch(graph, lines, io.StringIO(), count)
+        elapsed = time.perf_counter() - start or 1e-9
+        label = "serial" if count == 1 else f"{count or os.cpu_count()} processes"
+        results[label] = {"seconds": elapsed, "queries_per_second": len(pairs) / elapsed}
+        print(f"  {label + ':':<13} {len(pairs) / elapsed:,.0f} queries/s")
+    return results
+
+
+def benchmark_dataset(directory, args):
+    """
+    Runs every benchmark on the dataset in `directory` and returns
+    the results.
+    """
+    print(f"== {directory}")
+    results = {"directory": directory}
+    results["loaders"] = compare_loaders(directory)
+
+    if args.memory:
+        dictBytes, graphBytes = backend_memory(directory)
+        results["memory"] = {"dict_bytes": dictBytes, "csr_bytes": graphBytes}
+        print("Memory:")
+        print(f"  dict: {dictBytes / 2 ** 20:.2f} MiB")
+        print(f"  csr:  {graphBytes / 2 ** 20:.2f} MiB")
+
+    graph, results["snapshot"] = time_snapshot(directory)
+    results["dataset"] = {
+        "people": len(graph.person_ids),
+        "movies": len(graph.movie_ids),
+        "credits": len(graph.person_movies),
+    }
+    stats = graph.component_stats()
+    results["components"] = stats
+    print(f"Components: {stats['components']} (largest {stats['largest']}, "
+          f"isolated {stats['isolated']}, mean size {stats['mean']:.1f})")
+
+    results["neighbors"] = neighbor_throughput(graph, args.expansions, args.seed)
+    pairs = random_pairs(args.pairs, args.seed)
+    results["queries"] = compare_searches(pairs, graph)
+    results["batch"] = time_batch(graph, random_pairs(args.batch_pairs, args.seed), [1, None])
+    return results
+
+
+def environment():
+    """
+    Returns the commit, Python version and time of this run, so results
+    can be compared across commits.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading and searching degrees datasets."
+    )
+    parser.add_argument("directories", nargs="*",
+                        help="datasets to benchmark (default: large)")
+    parser.add_argument("--synthetic", type=int, action="append", default=[],
+                        metavar="PEOPLE",
+                        help="also benchmark a generated dataset of PEOPLE people")
+    parser.add_argument("--synthetic-dir", default="synthetic",
+                        help="where generated datasets are kept between runs")
+    parser.add_argument("--pairs", type=int, default=100)
+    parser.add_argument("--batch-pairs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--expansions", type=int, default=10000,
+        help="number of people whose neighbors are expanded per backend"
+    )
+    parser.add_argument("--memory", action="store_true",
+                        help="trace the memory of both backends (slow)")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write the results to FILE as JSON")
+    args = parser.parse_args()
+
+    directories = list(args.directories)
+    for people in args.synthetic:
+        directory = os.path.join(args.synthetic_dir, f"{people}-{args.seed}")
+        if not os.path.exists(os.path.join(directory, "stars.csv")):
+            print(f"Generating {directory}...")
+            synthetic.generate(directory, people, seed=args.seed)
+        directories.append(directory)
+    if not directories:
+        directories = ["large"]
+
+    results = environment()
+    results["runs"] = [benchmark_dataset(directory, args) for directory in directories]
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+import argparse
+import bisect
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import batch
+import loader
+import snapshot
+from graph import Graph
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,6 +20,12 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps person_ids to the id of the connected component they belong to
+components = {}
+
+# Sorted index of lower-cased names to person_ids, for prefix lookups
+name_index = NameIndex([], [])
+
 
 def load_data(directory):
     """
@@ -51,15 +65,282 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    label_components()
+    index_names()
+
+
+def load_data_streaming(directory):
+    """
+    Load data from CSV files into memory like load_data, but reading rows
+    positionally into slotted records with interned ids.
+
+    Returns the loader statistics: rows read, seconds, rows per second
+    and peak RSS.
+    """
+    stats = loader.stream_load(directory, names, people, movies)
+    label_components()
+    index_names()
+    return stats
+
+
+def index_names():
+    """
+    Build the sorted name index over everybody in `people`.
+    """
+    global name_index
+    person_ids = list(people)
+    name_index = NameIndex.build(
+        [people[person_id]["name"] for person_id in person_ids], person_ids
+    )
+
+
+def complete_name(prefix, k=10):
+    """
+    Returns the person_ids of the first `k` people, in alphabetical
+    order, whose name starts with `prefix`.
+    """
+    return name_index.prefix(prefix, k)
+
+
+def label_components():
+    """
+    Label every person with the id of their connected component in
+    the person/movie graph, using breadth-first search.
+    """
+    components.clear()
+    seenMovies = set()
+    label = 0
+    for person_id in people:
+        if person_id in components:
+            continue
+        components[person_id] = label
+        frontier = [person_id]
+        while frontier:
+            nextFrontier = []
+            for person in frontier:
+                for movie_id in people[person]["movies"]:
+                    if movie_id in seenMovies:
+                        continue
+                    seenMovies.add(movie_id)
+                    for star in movies[movie_id]["stars"]:
+                        if star not in components:
+                            components[star] = label
+                            nextFrontier.append(star)
+            frontier = nextFrontier
+        label += 1
+
+
+def apply_delta(directory):
+    """
+    Add the people, movies and star credits in the delta CSV files of
+    `directory` to the loaded data in place, relabelling only the
+    components that the new credits join together.
+
+    Returns the number of people, movies and credits added and the set of
+    component labels whose people may now be closer together.
+    """
+    global name_index
+
+    delta = loader.read_delta(directory)
+    sizes = component_sizes()
+    added = {"people": 0, "movies": 0, "stars": 0}
+
+    newPeople = []
+    for person_id, name, birth in delta["people"]:
+        if person_id in people:
+            continue
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+        components[person_id] = len(sizes)
+        sizes.append(1)
+        newPeople.append(person_id)
+        added["people"] += 1
+
+    for movie_id, title, year in delta["movies"]:
+        if movie_id in movies:
+            continue
+        movies[movie_id] = {"title": title, "year": year, "stars": set()}
+        added["movies"] += 1
+
+    touchedPeople = []
+    for person_id, movie_id in delta["stars"]:
+        if person_id not in people or movie_id not in movies:
+            continue
+        stars = movies[movie_id]["stars"]
+        if person_id in stars:
+            continue
+        if stars:
+            # Everybody in a movie shares a component, so joining it
+            # merges the person's component with the movie's
+            other = next(iter(stars))
+            personLabel = components[person_id]
+            movieLabel = components[other]
+            if personLabel != movieLabel:
+                if sizes[personLabel] < sizes[movieLabel]:
+                    _relabel(person_id, movieLabel)
+                    sizes[movieLabel] += sizes[personLabel]
+                    sizes[personLabel] = 0
+                else:
+                    _relabel(other, personLabel)
+                    sizes[personLabel] += sizes[movieLabel]
+                    sizes[movieLabel] = 0
+        people[person_id]["movies"].add(movie_id)
+        stars.add(person_id)
+        touchedPeople.append(person_id)
+        added["stars"] += 1
+
+    for person_id in newPeople:
+        name = people[person_id]["name"].lower()
+        position = bisect.bisect_left(name_index.keys, name)
+        name_index.keys.insert(position, name)
+        name_index.values.insert(position, person_id)
+
+    added["touched"] = {components[person_id] for person_id in touchedPeople}
+    return added
+
+
+def _relabel(start, label):
+    """
+    Give every person in the component of `start` the component id `label`.
+    """
+    old = components[start]
+    components[start] = label
+    frontier = [start]
+    while frontier:
+        nextFrontier = []
+        for person in frontier:
+            for movie_id in people[person]["movies"]:
+                for star in movies[movie_id]["stars"]:
+                    if components[star] == old:
+                        components[star] = label
+                        nextFrontier.append(star)
+        frontier = nextFrontier
+
+
+def component_sizes():
+    """
+    Returns a list giving the number of people in each component,
+    indexed by component id.
+    """
+    sizes = [0] * (max(components.values(), default=-1) + 1)
+    for label in components.values():
+        sizes[label] += 1
+    return sizes
+
+
+def load_graph(directory, rebuild=False, deltas=()):
+    """
+    Load the dataset in `directory` as a compact Graph, reopening the
+    binary snapshot next to the CSVs when it is still up to date, then
+    apply every delta directory in `deltas` to it.
+
+    When the CSVs had to be parsed the dictionaries are loaded too, and
+    the deltas are applied to them as well.
+    """
+    def load(directory):
+        load_data_streaming(directory)
+        return Graph.from_dicts(people, movies)
+    graph = snapshot.open_graph(directory, load, rebuild)
+
+    for delta in deltas:
+        graph.apply_delta(loader.read_delta(delta))
+        if people:
+            apply_delta(delta)
+    return graph
+
+
+def load_dicts(graph):
+    """
+    Fill `names`, `people` and `movies` from a Graph, for when the data
+    was read from a snapshot rather than from the CSVs.
+    """
+    global name_index
+
+    for person_id, person in graph.people.items():
+        people[person_id] = person
+    for movie_id, movie in graph.movies.items():
+        movies[movie_id] = movie
+    for name, person_ids in graph.names.items():
+        names[name] = set(person_ids)
+    for person_id, label in zip(graph.person_ids, graph.components):
+        components[person_id] = label
+    # The dict index is updated in place by apply_delta, so it must not
+    # share the graph's own key list
+    name_index = NameIndex(
+        list(graph.name_keys), [graph.person_ids[person] for person in graph.name_order]
+    )
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global names, people, movies
+
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--search", choices=["bfs", "bidirectional", "astar"],
+        default="bidirectional",
+        help="search strategy used to find the shortest path"
+    )
+    parser.add_argument(
+        "--landmarks", type=int, default=16,
+        help="number of landmarks indexed for astar search and --distance"
+    )
+    parser.add_argument(
+        "--distance", action="store_true",
+        help="only report bounds on the degrees of separation from the landmark index"
+    )
+    parser.add_argument(
+        "--backend", choices=["dict", "csr"], default="dict",
+        help="in-memory graph representation to search over"
+    )
+    parser.add_argument(
+        "--rebuild-cache", action="store_true",
+        help="regenerate the binary snapshot even if it is up to date"
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="answer the source/target pairs in FILE ('-' for stdin) as JSON lines"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=None,
+        help="number of worker processes used in batch mode"
+    )
+    parser.add_argument(
+        "--apply-delta", metavar="DIRECTORY", action="append", default=[],
+        help="add the people, movies and stars CSVs in DIRECTORY after loading"
+    )
+    args = parser.parse_args()
+    directory = args.directory
+
+    if args.batch is not None:
+        # Results are written to stdout, so keep progress messages off it
+        print("Loading data...", file=sys.stderr)
+        graph = load_graph(directory, args.rebuild_cache, args.apply_delta)
+        print("Data loaded.", file=sys.stderr)
+        if args.batch == "-":
+            lines = sys.stdin
+        else:
+            lines = open(args.batch, encoding="utf-8")
+        with lines:
+            batch.run_batch(
+                graph, lines, sys.stdout, args.processes,
+                bidirectional=args.search != "bfs"
+            )
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    graph = load_graph(directory, args.rebuild_cache, args.apply_delta)
+    if args.backend == "csr":
+        # Swap the dictionaries for read-only views over the compact graph
+        names, people, movies = graph.names, graph.people, graph.movies
+    elif not people:
+        load_dicts(graph)
+    index = None
+    if args.search == "astar" or args.distance:
+        index = LandmarkIndex.build(graph, args.landmarks)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +350,28 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.distance:
+        lower, upper = index.bounds(source, target)
+        if lower is None:
+            print("Not connected.")
+        elif lower == upper:
+            print(f"{lower} degrees of separation.")
+        elif upper is None:
+            print(f"At least {lower} degrees of separation.")
+        else:
+            print(f"Between {lower} and {upper} degrees of separation.")
+        return
+
+    if args.search == "astar":
+        path = index.shortest_path(source, target)
+    elif args.backend == "csr" and args.search == "bidirectional":
+        path = graph.bidirectional_shortest_path(source, target)
+    elif args.backend == "csr":
+        path = graph.shortest_path(source, target)
+    elif args.search == "bidirectional":
+        path = bidirectional_shortest_path(source, target)
+    else:
+        path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -91,13 +393,16 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    # People in different components can never be connected
+    if components[source] != components[target]:
+        return None
 
     listToReturn = []
     explored = set()
 
     # Initializing frontier
     startNode = Node(source, None, None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(startNode)
 
     while True:
@@ -128,6 +433,82 @@ def shortest_path(source, target):
                     frontier.add(newNode)
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+    if components[source] != components[target]:
+        return None
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # leads back towards the end the search started from
+    forwardParents = {source: None}
+    backwardParents = {target: None}
+    forwardFrontier = [source]
+    backwardFrontier = [target]
+
+    while forwardFrontier and backwardFrontier:
+        # Always grow the smaller side by one full level
+        if len(forwardFrontier) <= len(backwardFrontier):
+            frontier, parents, others = forwardFrontier, forwardParents, backwardParents
+        else:
+            frontier, parents, others = backwardFrontier, backwardParents, forwardParents
+
+        nextFrontier = []
+        meetings = []
+        for person in frontier:
+            for movie, actor in neighbors_for_person(person):
+                if actor in parents:
+                    continue
+                parents[actor] = (movie, person)
+                nextFrontier.append(actor)
+                if actor in others:
+                    meetings.append(actor)
+
+        # Every meeting found on this level is a candidate, keep the shortest
+        if meetings:
+            best = None
+            for actor in meetings:
+                path = _join_paths(actor, forwardParents, backwardParents)
+                if best is None or len(path) < len(best):
+                    best = path
+            return best
+
+        if frontier is forwardFrontier:
+            forwardFrontier = nextFrontier
+        else:
+            backwardFrontier = nextFrontier
+
+    return None
+
+
+def _join_paths(meeting, forwardParents, backwardParents):
+    """
+    Builds the (movie_id, person_id) path through `meeting` from the
+    parent links of both halves of a bidirectional search.
+    """
+    path = []
+    person = meeting
+    while forwardParents[person] is not None:
+        movie, parent = forwardParents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backwardParents[person] is not None:
+        movie, child = backwardParents[person]
+        path.append((movie, child))
+        person = child
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -0,0 +1,152 @@
+import argparse
+import sys
+
+import numpy as np
+from scipy import sparse
+
+import degrees
+
+# Distance reported for people the source cannot reach
+UNREACHABLE = -1
+
+
+class DistanceEngine():
+    """
+    Single-source breadth-first search over the person/movie graph held as
+    sparse incidence matrices, expanding a whole frontier at a time with
+    vectorized row slices instead of one person at a time.
+    """
+    def __init__(self, graph):
+        # The matrices are built once, so take in any applied deltas now
+        graph = graph.compacted()
+        self.graph = graph
+        numPeople = len(graph.person_ids)
+        numMovies = len(graph.movie_ids)
+
+        # people x movies and movies x people, sharing the graph's CSR arrays
+        self.starred = sparse.csr_matrix(
+            (np.ones(len(graph.person_movies), dtype=np.int8),
+             np.asarray(graph.person_movies, dtype=np.int32),
+             np.asarray(graph.person_offsets, dtype=np.int64)),
+            shape=(numPeople, numMovies)
+        )
+        self.cast = sparse.csr_matrix(
+            (np.ones(len(graph.movie_people), dtype=np.int8),
+             np.asarray(graph.movie_people, dtype=np.int32),
+             np.asarray(graph.movie_offsets, dtype=np.int64)),
+            shape=(numMovies, numPeople)
+        )
+
+    def single_source(self, source, max_depth=None):
+        """
+        Return the degrees of separation from person_id `source` to every
+        person index, stopping after `max_depth` degrees if given.
+
+        Returns three arrays indexed by person: the distance (UNREACHABLE
+        if not reached), the person index it was reached from and the
+        movie index they share (both -1 for the source and unreached people).
+        """
+        numPeople = len(self.graph.person_ids)
+        start = self.graph.person_index[source]
+
+        distances = np.full(numPeople, UNREACHABLE, dtype=np.int32)
+        parents = np.full(numPeople, -1, dtype=np.int32)
+        via = np.full(numPeople, -1, dtype=np.int32)
+        seenMovies = np.zeros(self.starred.shape[1], dtype=bool)
+
+        distances[start] = 0
+        frontier = np.array([start], dtype=np.int32)
+        depth = 0
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            depth += 1
+
+            # Movies of the frontier that have not been expanded yet, each
+            # remembering one frontier person who starred in it
+            rows = self.starred[frontier]
+            candidates = rows.indices
+            candidateParents = np.repeat(frontier, np.diff(rows.indptr))
+            fresh = ~seenMovies[candidates]
+            newMovies, first = np.unique(candidates[fresh], return_index=True)
+            movieParents = candidateParents[fresh][first]
+            seenMovies[newMovies] = True
+
+            # Stars of those movies that have not been reached yet
+            rows = self.cast[newMovies]
+            counts = np.diff(rows.indptr)
+            candidates = rows.indices
+            candidateMovies = np.repeat(newMovies, counts)
+            candidateParents = np.repeat(movieParents, counts)
+            fresh = distances[candidates] == UNREACHABLE
+            frontier, first = np.unique(candidates[fresh], return_index=True)
+            frontier = frontier.astype(np.int32)
+
+            distances[frontier] = depth
+            parents[frontier] = candidateParents[fresh][first]
+            via[frontier] = candidateMovies[fresh][first]
+
+        return distances, parents, via
+
+    def path(self, result, target):
+        """
+        Returns the list of (movie_id, person_id) pairs leading from the
+        source of a single_source `result` to person_id `target`, or None
+        if the search did not reach it.
+        """
+        graph = self.graph
+        distances, parents, via = result
+        person = graph.person_index[target]
+        if distances[person] == UNREACHABLE:
+            return None
+        path = []
+        while parents[person] != -1:
+            path.append((graph.movie_ids[via[person]], graph.person_ids[person]))
+            person = parents[person]
+        path.reverse()
+        return path
+
+    def within(self, source, k):
+        """
+        Return the person_ids of everyone within `k` degrees of `source`,
+        not counting `source` itself.
+        """
+        distances = self.single_source(source, max_depth=k)[0]
+        reached = np.nonzero(distances > 0)[0]
+        return [self.graph.person_ids[person] for person in reached]
+
+    def histogram(self, source, max_depth=None):
+        """
+        Return a list whose i-th entry is the number of people exactly
+        i degrees away from `source`.
+        """
+        distances = self.single_source(source, max_depth)[0]
+        return np.bincount(distances[distances != UNREACHABLE]).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print how many people are each number of degrees from someone."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--rebuild-cache", action="store_true")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    graph = degrees.load_graph(args.directory, args.rebuild_cache)
+    engine = DistanceEngine(graph)
+    print("Data loaded.")
+
+    degrees.names = graph.names
+    degrees.people = graph.people
+    source = degrees.person_id_for_name(input("Name: "))
+    if source is None:
+        sys.exit("Person not found.")
+
+    counts = engine.histogram(source, args.max_depth)
+    for depth, count in enumerate(counts):
+        print(f"{depth} degrees: {count}")
+    print(f"{len(graph.person_ids) - sum(counts)} people not reached.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,578 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from nameindex import NameIndex
+
+
+class Graph():
+    """
+    Compact person/movie graph for the degrees dataset.
+
+    People and movies are mapped to dense integers and the star credits are
+    held twice in compressed-sparse-row form: `person_offsets` and
+    `person_movies` list the movies of every person, `movie_offsets` and
+    `movie_people` the stars of every movie. Searches run entirely over the
+    integers; string ids are only used at the API edges.
+
+    Every person is also labelled with the id of the connected component
+    they belong to, so that pairs in different components are answered
+    without searching.
+
+    Credits added by apply_delta are kept in per-person and per-movie
+    overlay lists next to the CSR arrays, which are never modified.
+    """
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 components=None, name_keys=None, name_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        self.person_index = {pid: i for i, pid in enumerate(person_ids)}
+        self.movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+        if components is None:
+            components = self.label_components()
+        self.components = components
+        self._component_sizes = None
+
+        # Sorted lower-cased names and the person index of each of them
+        if name_keys is None:
+            index = NameIndex.build(person_names, range(len(person_ids)))
+            name_keys, name_order = index.keys, array("i", index.values)
+        self.name_keys = name_keys
+        self.name_order = name_order
+        self.name_index = NameIndex(name_keys, name_order)
+
+        # Credits added since the CSR arrays were built
+        self.base_people = len(person_offsets) - 1
+        self.base_movies = len(movie_offsets) - 1
+        self.extra_movies = {}
+        self.extra_stars = {}
+        self.updated = False
+
+        # Read-only views shaped like the `names`, `people` and `movies`
+        # dictionaries built by degrees.load_data
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names = NamesView(self)
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Build a graph from the `people` and `movies` dictionaries
+        filled in by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+        person_offsets = array("q", [0])
+        person_movies = array("i")
+        for pid in person_ids:
+            person_movies.extend(
+                sorted(movie_index[mid] for mid in people[pid]["movies"])
+            )
+            person_offsets.append(len(person_movies))
+
+        movie_offsets = array("q", [0])
+        movie_people = array("i")
+        for mid in movie_ids:
+            movie_people.extend(
+                sorted(person_index[pid] for pid in movies[mid]["stars"])
+            )
+            movie_offsets.append(len(movie_people))
+
+        return cls(
+            person_ids,
+            [people[pid]["name"] for pid in person_ids],
+            [people[pid]["birth"] for pid in person_ids],
+            movie_ids,
+            [movies[mid]["title"] for mid in movie_ids],
+            [movies[mid]["year"] for mid in movie_ids],
+            person_offsets, person_movies, movie_offsets, movie_people
+        )
+
+    def compacted(self):
+        """
+        Return a new Graph whose CSR arrays include every credit added by
+        apply_delta.
+        """
+        if not self.updated:
+            return self
+        person_offsets = array("q", [0])
+        person_movies = array("i")
+        for person in range(len(self.person_ids)):
+            person_movies.extend(sorted(self.movies_of(person)))
+            person_offsets.append(len(person_movies))
+        movie_offsets = array("q", [0])
+        movie_people = array("i")
+        for movie in range(len(self.movie_ids)):
+            movie_people.extend(sorted(self.stars_of(movie)))
+            movie_offsets.append(len(movie_people))
+        return Graph(
+            self.person_ids, self.person_names, self.person_births,
+            self.movie_ids, self.movie_titles, self.movie_years,
+            person_offsets, person_movies, movie_offsets, movie_people,
+            self.components, self.name_keys, self.name_order
+        )
+
+    def apply_delta(self, delta):
+        """
+        Add the people, movies and star credits of `delta`, as returned by
+        loader.read_delta, to the graph in place. Rows for people and movies
+        that already exist and duplicate credits are ignored.
+
+        Component labels are only updated for the components that gain a
+        credit; when a credit joins two components the smaller one is
+        relabelled. Returns the number of people, movies and credits added
+        and the set of (new) component labels whose people may now be
+        closer together, under the key "touched".
+        """
+        if not self.updated:
+            # Labels and the name order may live in a read-only snapshot
+            self.components = array("i", self.components)
+            self.name_order = array("i", self.name_order)
+            self.name_index = NameIndex(self.name_keys, self.name_order)
+            self.movies_of = self._updated_movies_of
+            self.stars_of = self._updated_stars_of
+            self.updated = True
+        sizes = list(self.component_sizes())
+
+        added = {"people": 0, "movies": 0, "stars": 0}
+        for person_id, name, birth in delta["people"]:
+            if person_id in self.person_index:
+                continue
+            person = len(self.person_ids)
+            self.person_index[person_id] = person
+            self.person_ids.append(person_id)
+            self.person_names.append(name)
+            self.person_births.append(birth)
+            self.components.append(len(sizes))
+            sizes.append(1)
+            position = bisect_left(self.name_keys, name.lower())
+            self.name_keys.insert(position, name.lower())
+            self.name_order.insert(position, person)
+            added["people"] += 1
+
+        for movie_id, title, year in delta["movies"]:
+            if movie_id in self.movie_index:
+                continue
+            self.movie_index[movie_id] = len(self.movie_ids)
+            self.movie_ids.append(movie_id)
+            self.movie_titles.append(title)
+            self.movie_years.append(year)
+            added["movies"] += 1
+
+        touchedPeople = []
+        for person_id, movie_id in delta["stars"]:
+            person = self.person_index.get(person_id)
+            movie = self.movie_index.get(movie_id)
+            if person is None or movie is None or movie in self.movies_of(person):
+                continue
+            stars = self.stars_of(movie)
+            if len(stars):
+                # Everybody in a movie shares a component, so joining it
+                # merges the person's component with the movie's
+                other = stars[0]
+                personLabel = self.components[person]
+                movieLabel = self.components[other]
+                if personLabel != movieLabel:
+                    if sizes[personLabel] < sizes[movieLabel]:
+                        self._relabel(person, movieLabel)
+                        sizes[movieLabel] += sizes[personLabel]
+                        sizes[personLabel] = 0
+                    else:
+                        self._relabel(other, personLabel)
+                        sizes[personLabel] += sizes[movieLabel]
+                        sizes[movieLabel] = 0
+            self.extra_movies.setdefault(person, []).append(movie)
+            self.extra_stars.setdefault(movie, []).append(person)
+            touchedPeople.append(person)
+            added["stars"] += 1
+
+        if added["people"]:
+            # New people may bring new names
+            self.names._length = None
+        self._component_sizes = sizes
+        added["touched"] = {self.components[person] for person in touchedPeople}
+        return added
+
+    def _relabel(self, start, label):
+        """
+        Give every person in the component of person index `start` the
+        component id `label`.
+        """
+        components = self.components
+        old = components[start]
+        components[start] = label
+        frontier = [start]
+        while frontier:
+            nextFrontier = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    for other in self.stars_of(movie):
+                        if components[other] == old:
+                            components[other] = label
+                            nextFrontier.append(other)
+            frontier = nextFrontier
+
+    def _updated_movies_of(self, person):
+        if person < self.base_people:
+            movies = Graph.movies_of(self, person)
+        else:
+            movies = ()
+        extra = self.extra_movies.get(person)
+        if extra:
+            return list(movies) + extra
+        return movies
+
+    def _updated_stars_of(self, movie):
+        if movie < self.base_movies:
+            stars = Graph.stars_of(self, movie)
+        else:
+            stars = ()
+        extra = self.extra_stars.get(movie)
+        if extra:
+            return list(stars) + extra
+        return stars
+
+    def resolve(self, value):
+        """
+        Return the person_id for `value`, which may be either a person_id or
+        a name, and an error message if it cannot be resolved unambiguously.
+        """
+        if value in self.person_index:
+            return value, None
+        person_ids = self.names.get(value.lower(), set())
+        if len(person_ids) == 0:
+            return None, f"Person not found: {value}"
+        elif len(person_ids) > 1:
+            return None, f"Ambiguous name: {value} ({', '.join(sorted(person_ids))})"
+        return next(iter(person_ids)), None
+
+    def complete(self, prefix, k=10):
+        """
+        Return the person_ids of the first `k` people, in alphabetical
+        order, whose name starts with `prefix`, ignoring case.
+        """
+        return [self.person_ids[person] for person in self.name_index.prefix(prefix, k)]
+
+    def label_components(self):
+        """
+        Return an array giving the connected component id of every person,
+        found by breadth-first search over the person/movie graph.
+        """
+        labels = array("i", [-1]) * len(self.person_ids)
+        seenMovies = bytearray(len(self.movie_ids))
+        label = 0
+        for start in range(len(labels)):
+            if labels[start] != -1:
+                continue
+            labels[start] = label
+            frontier = [start]
+            while frontier:
+                nextFrontier = []
+                for person in frontier:
+                    for movie in self.movies_of(person):
+                        if seenMovies[movie]:
+                            continue
+                        seenMovies[movie] = 1
+                        for other in self.stars_of(movie):
+                            if labels[other] == -1:
+                                labels[other] = label
+                                nextFrontier.append(other)
+                frontier = nextFrontier
+            label += 1
+        return labels
+
+    def component_sizes(self):
+        """
+        Return a list giving the number of people in each component,
+        indexed by component id.
+        """
+        if self._component_sizes is None:
+            sizes = [0] * (max(self.components, default=-1) + 1)
+            for label in self.components:
+                sizes[label] += 1
+            self._component_sizes = sizes
+        return self._component_sizes
+
+    def component_stats(self):
+        """
+        Return summary statistics about the sizes of the components.
+        """
+        return component_stats(self.component_sizes())
+
+    def connected(self, source, target):
+        """
+        Return True if person_ids `source` and `target` are in the same component.
+        """
+        components = self.components
+        return (components[self.person_index[source]] ==
+                components[self.person_index[target]])
+
+    def movies_of(self, person):
+        """
+        Return the movie indices of person index `person`.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """
+        Return the person indices of movie index `movie`.
+        """
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Yield (movie, person) index pairs for people who starred
+        with person index `person`.
+        """
+        for movie in self.movies_of(person):
+            for other in self.stars_of(movie):
+                yield movie, other
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        movie_ids = self.movie_ids
+        person_ids = self.person_ids
+        return {
+            (movie_ids[movie], person_ids[other])
+            for movie, other in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        s = self.person_index[source]
+        t = self.person_index[target]
+        if s == t:
+            return []
+        if self.components[s] != self.components[t]:
+            return None
+
+        parents = {s: None}
+        seenMovies = set()
+        frontier = [s]
+        while frontier:
+            nextFrontier = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    # Every star of a movie is reached the first time the
+                    # movie is expanded, so each movie is expanded once
+                    if movie in seenMovies:
+                        continue
+                    seenMovies.add(movie)
+                    for other in self.stars_of(movie):
+                        if other in parents:
+                            continue
+                        parents[other] = (movie, person)
+                        if other == t:
+                            return self._path_to(t, parents)
+                        nextFrontier.append(other)
+            frontier = nextFrontier
+        return None
+
+    def bidirectional_shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching breadth-first
+        from both ends at once and meeting in the middle.
+
+        If no possible path, returns None.
+        """
+        s = self.person_index[source]
+        t = self.person_index[target]
+        if s == t:
+            return []
+        if self.components[s] != self.components[t]:
+            return None
+
+        forwardParents = {s: None}
+        backwardParents = {t: None}
+        forwardFrontier = [s]
+        backwardFrontier = [t]
+        forwardMovies = set()
+        backwardMovies = set()
+
+        while forwardFrontier and backwardFrontier:
+            # Always grow the smaller side by one full level
+            if len(forwardFrontier) <= len(backwardFrontier):
+                frontier, parents, others, seenMovies = (
+                    forwardFrontier, forwardParents, backwardParents, forwardMovies
+                )
+            else:
+                frontier, parents, others, seenMovies = (
+                    backwardFrontier, backwardParents, forwardParents, backwardMovies
+                )
+
+            nextFrontier = []
+            meetings = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    if movie in seenMovies:
+                        continue
+                    seenMovies.add(movie)
+                    for other in self.stars_of(movie):
+                        if other in parents:
+                            continue
+                        parents[other] = (movie, person)
+                        nextFrontier.append(other)
+                        if other in others:
+                            meetings.append(other)
+
+            # Every meeting found on this level is a candidate, keep the shortest
+            if meetings:
+                best = None
+                for person in meetings:
+                    path = (self._path_to(person, forwardParents) +
+                            self._path_from(person, backwardParents))
+                    if best is None or len(path) < len(best):
+                        best = path
+                return best
+
+            if frontier is forwardFrontier:
+                forwardFrontier = nextFrontier
+            else:
+                backwardFrontier = nextFrontier
+
+        return None
+
+    def _path_to(self, person, parents):
+        """
+        Follow `parents` back from person index `person` to the search
+        root and return the (movie_id, person_id) path from the root.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = parent
+        path.reverse()
+        return path
+
+    def _path_from(self, person, parents):
+        """
+        Follow `parents` from person index `person` towards the search
+        root and return the (movie_id, person_id) steps taken.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, child = parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[child]))
+            person = child
+        return path
+
+
+def component_stats(sizes):
+    """
+    Return the number of components, the size of the largest one, the
+    number of people who share no movie with anybody and the mean
+    component size, given the list of component sizes.
+    """
+    # Components merged away by Graph.apply_delta are left empty
+    sizes = [size for size in sizes if size]
+    return {
+        "components": len(sizes),
+        "largest": max(sizes, default=0),
+        "isolated": sum(1 for size in sizes if size == 1),
+        "mean": sum(sizes) / len(sizes) if sizes else 0,
+    }
+
+
+class PeopleView(Mapping):
+    """
+    Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids).
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie] for movie in graph.movies_of(person)}
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids).
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person] for person in graph.stars_of(movie)}
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Maps lower-cased names to a set of corresponding person_ids,
+    answered from the graph's sorted name index.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self._length = None
+
+    def __getitem__(self, name):
+        people = self.graph.name_index.exact(name)
+        if not people or name != name.lower():
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        return self.graph.name_index.unique_names()
+
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(1 for name in self)
+        return self._length
@@ -0,0 +1,205 @@
+import heapq
+import itertools
+import random
+from array import array
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+    """
+    Distance oracle built from breadth-first searches out of a few
+    landmark people (the ALT technique: A*, landmarks, triangle inequality).
+
+    For every landmark L the index keeps d(L, p) for every person p, so for
+    any pair (s, t) in the same component
+
+        |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+    The lower bound is also used as an admissible heuristic for A*.
+    The index must be rebuilt after Graph.apply_delta, since new credits
+    can shorten distances.
+    """
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, landmarks=16, seed=None):
+        """
+        Build an index over `graph`. `landmarks` is either the number of
+        landmarks to choose or a list of the person_ids to use.
+        """
+        if isinstance(landmarks, int):
+            people = select_landmarks(graph, landmarks, seed)
+        else:
+            people = [graph.person_index[pid] for pid in landmarks]
+        return cls(graph, people, [bfs_distances(graph, p) for p in people])
+
+    def bounds(self, source, target):
+        """
+        Return (lower, upper) bounds on the degrees of separation between
+        person_ids `source` and `target`. The upper bound is None when no
+        landmark shares their component; both are None if they are not
+        connected at all.
+        """
+        s = self.graph.person_index[source]
+        t = self.graph.person_index[target]
+        if s == t:
+            return 0, 0
+        if self.graph.components[s] != self.graph.components[t]:
+            return None, None
+
+        lower = 1
+        upper = None
+        for distances in self.distances:
+            ds = distances[s]
+            dt = distances[t]
+            if ds == UNREACHABLE:
+                continue
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Return a function giving a lower bound on the distance from a person
+        index to person index `target`.
+        """
+        columns = [
+            (distances, distances[target]) for distances in self.distances
+            if distances[target] != UNREACHABLE
+        ]
+
+        def estimate(person):
+            best = 0
+            for distances, dt in columns:
+                difference = abs(distances[person] - dt)
+                if difference > best:
+                    best = difference
+            return best
+        return estimate
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, found by A* search guided
+        by the landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        if s == t:
+            return []
+        if graph.components[s] != graph.components[t]:
+            return None
+
+        estimate = self.heuristic(t)
+        estimates = {}
+        cost = {s: 0}
+        parents = {s: None}
+        explored = set()
+
+        # Every star of a movie is reached at the cost of the person it was
+        # expanded from, so a movie is only expanded again from a person
+        # reached more cheaply than that
+        movieCost = {}
+        counter = itertools.count()
+        frontier = [(estimate(s), next(counter), s)]
+
+        while frontier:
+            _, _, person = heapq.heappop(frontier)
+            if person in explored:
+                continue
+            if person == t:
+                path = []
+                while parents[person] is not None:
+                    movie, parent = parents[person]
+                    path.append((graph.movie_ids[movie], graph.person_ids[person]))
+                    person = parent
+                path.reverse()
+                return path
+            explored.add(person)
+
+            # The landmark bounds are consistent, so the first time a person
+            # is removed from the frontier its cost is final
+            depth = cost[person] + 1
+            for movie in graph.movies_of(person):
+                if movieCost.get(movie, depth) < depth:
+                    continue
+                movieCost[movie] = depth - 1
+                for other in graph.stars_of(movie):
+                    if other in explored:
+                        continue
+                    if other not in cost or depth < cost[other]:
+                        cost[other] = depth
+                        parents[other] = (movie, person)
+                        if other not in estimates:
+                            estimates[other] = estimate(other)
+                        heapq.heappush(
+                            frontier, (depth + estimates[other], next(counter), other)
+                        )
+        return None
+
+
+def select_landmarks(graph, count, seed=None):
+    """
+    Choose `count` landmark person indices: the best connected person of
+    every component first, largest components first, then people picked
+    at random from the largest component.
+    """
+    sizes = graph.component_sizes()
+    best = {}
+    for person in range(len(graph.person_ids)):
+        label = graph.components[person]
+        degree = len(graph.movies_of(person))
+        if label not in best or degree > best[label][0]:
+            best[label] = (degree, person)
+
+    ordered = sorted(best, key=lambda label: sizes[label], reverse=True)
+    landmarks = [best[label][1] for label in ordered if sizes[label] > 1][:count]
+
+    if len(landmarks) < count and ordered:
+        rng = random.Random(seed)
+        largest = [
+            person for person in range(len(graph.person_ids))
+            if graph.components[person] == ordered[0] and person not in landmarks
+        ]
+        landmarks += rng.sample(largest, min(count - len(landmarks), len(largest)))
+    return landmarks
+
+
+def bfs_distances(graph, source):
+    """
+    Return an array giving the degrees of separation from person index
+    `source` to every person, with UNREACHABLE for other components.
+    Distances are stored in a signed byte each unless a path is long
+    enough to need two.
+    """
+    distances = array("h", [UNREACHABLE]) * len(graph.person_ids)
+    seenMovies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        nextFrontier = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if seenMovies[movie]:
+                    continue
+                seenMovies[movie] = 1
+                for other in graph.stars_of(movie):
+                    if distances[other] == UNREACHABLE:
+                        distances[other] = depth
+                        nextFrontier.append(other)
+        frontier = nextFrontier
+
+    if depth <= 127:
+        return array("b", distances)
+    return distances
@@ -0,0 +1,154 @@
+import csv
+import os
+import sys
+import time
+
+
+class Person():
+    """
+    Slotted record for one person, indexable like the dictionaries built
+    by degrees.load_data: person["name"], person["birth"], person["movies"].
+    """
+    __slots__ = ("name", "birth", "movies")
+
+    def __init__(self, name, birth):
+        self.name = name
+        self.birth = birth
+        self.movies = set()
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class Movie():
+    """
+    Slotted record for one movie, indexable like the dictionaries built
+    by degrees.load_data: movie["title"], movie["year"], movie["stars"].
+    """
+    __slots__ = ("title", "year", "stars")
+
+    def __init__(self, title, year):
+        self.title = title
+        self.year = year
+        self.stars = set()
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+def stream_load(directory, names, people, movies):
+    """
+    Load the CSV files in `directory` into `names`, `people` and `movies`,
+    reading rows positionally and interning the ids so that every credit
+    refers to the same string objects as the keys.
+
+    Returns the number of rows read, the elapsed seconds, the rows per
+    second and the peak resident set size of the process in KiB (None
+    where it cannot be measured).
+    """
+    start = time.perf_counter()
+    rows = 0
+    intern = sys.intern
+
+    with open(f"{directory}/people.csv", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        idColumn = header.index("id")
+        nameColumn = header.index("name")
+        birthColumn = header.index("birth")
+        for row in reader:
+            rows += 1
+            person_id = intern(row[idColumn])
+            name = row[nameColumn]
+            people[person_id] = Person(name, row[birthColumn])
+            key = name.lower()
+            ids = names.get(key)
+            if ids is None:
+                names[key] = {person_id}
+            else:
+                ids.add(person_id)
+
+    with open(f"{directory}/movies.csv", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        idColumn = header.index("id")
+        titleColumn = header.index("title")
+        yearColumn = header.index("year")
+        for row in reader:
+            rows += 1
+            movies[intern(row[idColumn])] = Movie(row[titleColumn], row[yearColumn])
+
+    with open(f"{directory}/stars.csv", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        personColumn = header.index("person_id")
+        movieColumn = header.index("movie_id")
+        for row in reader:
+            rows += 1
+            person_id = intern(row[personColumn])
+            movie_id = intern(row[movieColumn])
+            person = people.get(person_id)
+            movie = movies.get(movie_id)
+            if person is None or movie is None:
+                continue
+            person.movies.add(movie_id)
+            movie.stars.add(person_id)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0,
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def peak_rss_kib():
+    """
+    Return the peak resident set size of this process in KiB, or None
+    where the resource module is not available, as on Windows.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes where Linux reports kilobytes
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def read_delta(directory):
+    """
+    Read the people.csv, movies.csv and stars.csv delta files present in
+    `directory` (any of them may be missing) and return their rows as
+    lists of (id, name, birth), (id, title, year) and (person_id, movie_id)
+    tuples under the keys "people", "movies" and "stars".
+    """
+    intern = sys.intern
+    columns = {
+        "people": ("people.csv", ["id", "name", "birth"]),
+        "movies": ("movies.csv", ["id", "title", "year"]),
+        "stars": ("stars.csv", ["person_id", "movie_id"]),
+    }
+    delta = {}
+    for key, (filename, fields) in columns.items():
+        rows = []
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                positions = [header.index(field) for field in fields]
+                for row in reader:
+                    if not row:
+                        continue
+                    values = [row[i] for i in positions]
+                    if key == "stars":
+                        values = [intern(value) for value in values]
+                    else:
+                        values[0] = intern(values[0])
+                    rows.append(tuple(values))
+        delta[key] = rows
+    return delta
@@ -0,0 +1,57 @@
+from bisect import bisect_left, bisect_right
+
+
+class NameIndex():
+    """
+    Sorted array of lower-cased names, each paired with the value (a
+    person_id or a person index) it stands for. Exact and prefix lookups
+    are binary searches, so they stay fast at millions of names.
+    """
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+
+    @classmethod
+    def build(cls, names, values):
+        """
+        Build an index from parallel sequences of names and values.
+        """
+        lowered = [name.lower() for name in names]
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        return cls([lowered[i] for i in order], [values[i] for i in order])
+
+    def exact(self, name):
+        """
+        Return the values of every entry whose name is `name`, ignoring case.
+        """
+        name = name.lower()
+        start = bisect_left(self.keys, name)
+        end = bisect_right(self.keys, name, start)
+        return [self.values[i] for i in range(start, end)]
+
+    def prefix(self, prefix, k=10):
+        """
+        Return the values of the first `k` entries, in alphabetical order,
+        whose name starts with `prefix`, ignoring case.
+        """
+        prefix = prefix.lower()
+        keys = self.keys
+        matches = []
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and len(matches) < k and keys[i].startswith(prefix):
+            matches.append(self.values[i])
+            i += 1
+        return matches
+
+    def unique_names(self):
+        """
+        Yield every distinct lower-cased name once, in alphabetical order.
+        """
+        previous = None
+        for key in self.keys:
+            if key != previous:
+                yield key
+                previous = key
+
+    def __len__(self):
+        return len(self.keys)
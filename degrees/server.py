@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+import loader
+from util import LRUCache
+
+# Graph used by the worker that computes paths. It is set before the
+# executor starts so that forked worker processes inherit it.
+graph = None
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def compute_path(source, target):
+    """
+    Return the shortest path from person_id `source` to `target`.
+    """
+    return graph.bidirectional_shortest_path(source, target)
+
+
+def reverse_path(source, path):
+    """
+    Turn a (movie_id, person_id) path that starts at person_id `source`
+    into the path that leads from its last person back to `source`.
+    """
+    if path is None:
+        return None
+    people = [source] + [person_id for movie_id, person_id in path]
+    movies = [movie_id for movie_id, person_id in path]
+    return [
+        (movies[i - 1], people[i - 1]) for i in range(len(path), 0, -1)
+    ]
+
+
+class DegreesServer():
+    """
+    Answers degrees of separation queries over HTTP from a graph that is
+    loaded once. Paths are computed in an executor and cached in an LRU
+    keyed by the unordered (source, target) pair.
+    """
+    def __init__(self, sharedGraph, cache_size=1024, workers=None,
+                 executor="process"):
+        global graph
+        graph = sharedGraph
+        self.graph = sharedGraph
+        self.cache = LRUCache(cache_size)
+        self.pending = {}
+        self.workers = workers
+        self.executorKind = executor
+        self.executor = self._start_executor()
+
+        self.requests = 0
+        self.errors = 0
+        self.computeCount = 0
+        self.computeSeconds = 0.0
+        self.latencySeconds = 0.0
+        self.latencyMax = 0.0
+
+    def _start_executor(self):
+        if (self.executorKind == "process" and
+                "fork" in multiprocessing.get_all_start_methods()):
+            return concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("fork")
+            )
+        return concurrent.futures.ThreadPoolExecutor(self.workers)
+
+    async def update(self, directory):
+        """
+        Apply the delta CSVs in `directory` to the graph and drop only the
+        cached results that the new credits may have changed.
+        """
+        # Let computations already running finish against the old graph
+        while self.pending:
+            await asyncio.gather(*self.pending.values(), return_exceptions=True)
+
+        added = self.graph.apply_delta(loader.read_delta(directory))
+        touched = added["touched"]
+        components = self.graph.components
+        index = self.graph.person_index
+
+        # A cached pair can only change if both people now share a component
+        # that gained a credit; pairs in different components stay unconnected
+        def stale(key, value):
+            labels = {components[index[person_id]] for person_id in key}
+            return len(labels) == 1 and labels <= touched
+
+        invalidated = self.cache.invalidate(stale)
+
+        # Forked workers hold a copy of the old graph, so start fresh ones
+        if isinstance(self.executor, concurrent.futures.ProcessPoolExecutor):
+            self.executor.shutdown()
+            self.executor = self._start_executor()
+
+        return {
+            "people": added["people"],
+            "movies": added["movies"],
+            "stars": added["stars"],
+            "touched_components": len(touched),
+            "invalidated": invalidated,
+        }
+
+    async def path(self, source, target):
+        """
+        Return the shortest path between person_ids `source` and `target`
+        and whether it came from the cache.
+        """
+        key = frozenset((source, target))
+        cached = self.cache.get(key)
+        if cached is not None:
+            start, path = cached
+            return (path if start == source else reverse_path(start, path)), True
+
+        # Several requests for the same pair share a single computation
+        future = self.pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._compute(key, source, target))
+            self.pending[key] = future
+        start, path = await future
+        return (path if start == source else reverse_path(start, path)), False
+
+    async def _compute(self, key, source, target):
+        try:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            path = await loop.run_in_executor(
+                self.executor, compute_path, source, target
+            )
+            self.computeCount += 1
+            self.computeSeconds += time.perf_counter() - started
+            self.cache.put(key, (source, path))
+            return source, path
+        finally:
+            del self.pending[key]
+
+    def stats(self):
+        """
+        Return the cache and latency counters.
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cache": {
+                "size": len(self.cache),
+                "maxsize": self.cache.maxsize,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+            "latency_ms": {
+                "mean": (self.latencySeconds / self.requests * 1000
+                         if self.requests else 0),
+                "max": self.latencyMax * 1000,
+            },
+            "compute_ms": {
+                "count": self.computeCount,
+                "mean": (self.computeSeconds / self.computeCount * 1000
+                         if self.computeCount else 0),
+            },
+        }
+
+    def complete(self, prefix, k):
+        """
+        Return the type-ahead matches for a name prefix.
+        """
+        graph = self.graph
+        matches = []
+        for person_id in graph.complete(prefix, int(k)):
+            person = graph.person_index[person_id]
+            matches.append({
+                "id": person_id,
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+            })
+        return {"prefix": prefix, "matches": matches}
+
+    async def route(self, method, target):
+        """
+        Return the (status, body) response for an HTTP request.
+        """
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/update":
+            if method != "POST":
+                return 405, {"error": "Use POST to apply an update"}
+            if "directory" not in query:
+                return 400, {"error": "A delta directory is required"}
+            return 200, await self.update(query["directory"])
+        if method != "GET":
+            return 405, {"error": "Only GET is supported"}
+
+        if url.path == "/stats":
+            return 200, self.stats()
+        if url.path == "/complete":
+            return 200, self.complete(query.get("prefix", ""), query.get("k", "10"))
+        if url.path != "/path":
+            return 404, {"error": f"Unknown endpoint: {url.path}"}
+        if "source" not in query or "target" not in query:
+            return 400, {"error": "Both source and target are required"}
+
+        source, error = self.graph.resolve(query["source"])
+        if error is None:
+            target, error = self.graph.resolve(query["target"])
+        if error is not None:
+            return 404, {"error": error}
+
+        path, cached = await self.path(source, target)
+        body = {"source": source, "target": target, "cached": cached}
+        if path is None:
+            body["degrees"] = None
+            body["path"] = None
+        else:
+            body["degrees"] = len(path)
+            body["path"] = [[movie_id, person_id] for movie_id, person_id in path]
+        return 200, body
+
+    async def handle(self, reader, writer):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it.
+        """
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                # Skip any request body, so that it is not read as the next
+                # request on a keep-alive connection
+                length = headers.get("content-length", "0")
+                if length.isdigit() and int(length):
+                    await reader.readexactly(int(length))
+
+                started = time.perf_counter()
+                try:
+                    if not length.isdigit():
+                        raise ValueError(length)
+                    method, target, version = requestLine.decode("latin-1").split()
+                    status, body = await self.route(method, target)
+                except ValueError:
+                    version = "HTTP/1.0"
+                    status, body = 400, {"error": "Malformed request"}
+                except Exception as e:
+                    status, body = 500, {"error": str(e)}
+
+                elapsed = time.perf_counter() - started
+                self.requests += 1
+                self.latencySeconds += elapsed
+                self.latencyMax = max(self.latencyMax, elapsed)
+                if status != 200:
+                    self.errors += 1
+
+                keepAlive = (version == "HTTP/1.1" and
+                             headers.get("connection", "").lower() != "close")
+                payload = json.dumps(body).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'Internal Server Error')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n"
+                    f"\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8050, socket_path=None):
+        """
+        Listen on a Unix socket if `socket_path` is given, on TCP otherwise.
+        """
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle, socket_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            for sock in server.sockets:
+                print(f"Listening on {sock.getsockname()}", file=sys.stderr)
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve degrees of separation queries over HTTP."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--executor", choices=["process", "thread"], default="process",
+        help="where path computations run"
+    )
+    parser.add_argument("--rebuild-cache", action="store_true")
+    parser.add_argument(
+        "--apply-delta", metavar="DIRECTORY", action="append", default=[],
+        help="add the people, movies and stars CSVs in DIRECTORY after loading"
+    )
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    sharedGraph = degrees.load_graph(
+        args.directory, args.rebuild_cache, args.apply_delta
+    )
+    print("Data loaded.", file=sys.stderr)
+
+    server = DegreesServer(
+        sharedGraph, args.cache_size, args.workers, args.executor
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
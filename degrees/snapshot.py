@@ -0,0 +1,192 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP1"
+VERSION = 3
+
+# Name of the snapshot file written next to the CSVs it was built from
+SNAPSHOT_NAME = "degrees.snapshot"
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+ARRAYS = {
+    "person_offsets": "q",
+    "person_movies": "i",
+    "movie_offsets": "q",
+    "movie_people": "i",
+    "components": "i",
+    "name_order": "i",
+}
+
+STRINGS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+    "name_keys",
+]
+
+
+def snapshot_path(directory):
+    """
+    Return the path of the snapshot for the dataset in `directory`.
+    """
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_fingerprint(directory):
+    """
+    Return the size and modification time of every source CSV, used to
+    tell whether a snapshot is still up to date.
+    """
+    fingerprint = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        fingerprint[filename] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def save_snapshot(graph, path, fingerprint):
+    """
+    Serialize `graph` to a single snapshot file at `path`.
+
+    The file holds a magic string, the length of a JSON header, the header
+    itself and then every section, each aligned to 8 bytes. Integer arrays
+    are stored raw so that they can be mapped back without copying; string
+    tables are stored as NUL-separated UTF-8.
+    """
+    graph = graph.compacted()
+    sections = []
+    for name, typecode in ARRAYS.items():
+        values = getattr(graph, name)
+        if not isinstance(values, array) or values.typecode != typecode:
+            values = array(typecode, values)
+        sections.append((name, typecode, len(values), values.tobytes()))
+    for name in STRINGS:
+        values = getattr(graph, name)
+        sections.append((name, "s", len(values), "\0".join(values).encode("utf-8")))
+
+    # The header records absolute offsets, which depend on the header length,
+    # so lay the sections out relative to the start of the data first
+    layout = {}
+    position = 0
+    for name, typecode, count, data in sections:
+        layout[name] = [position, len(data), typecode, count]
+        position += _padded(len(data))
+
+    header = {"version": VERSION, "sources": fingerprint, "sections": layout}
+    headerBytes = json.dumps(header).encode("utf-8")
+    dataStart = _padded(len(MAGIC) + 8 + len(headerBytes))
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(headerBytes)))
+        f.write(headerBytes)
+        f.write(b"\0" * (dataStart - f.tell()))
+        for name, typecode, count, data in sections:
+            f.write(data)
+            f.write(b"\0" * (_padded(len(data)) - len(data)))
+        f.write(struct.pack("<Q", dataStart))
+    os.replace(temporary, path)
+
+
+def load_snapshot(path, fingerprint=None):
+    """
+    Open the snapshot at `path` and return the Graph it holds, with the
+    integer arrays backed directly by a read-only memory map.
+
+    Returns None if there is no snapshot, if it is unreadable, or if
+    `fingerprint` is given and does not match the sources it was built from.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    try:
+        header, dataStart = _read_header(mapped)
+    except ValueError:
+        mapped.close()
+        return None
+    if fingerprint is not None and header["sources"] != fingerprint:
+        mapped.close()
+        return None
+
+    view = memoryview(mapped)
+    values = {}
+    for name, (offset, length, typecode, count) in header["sections"].items():
+        start = dataStart + offset
+        if typecode == "s":
+            values[name] = (
+                bytes(view[start:start + length]).decode("utf-8").split("\0")
+                if count else []
+            )
+        else:
+            values[name] = view[start:start + length].cast(typecode)
+
+    return Graph(**values)
+
+
+def open_graph(directory, load, rebuild=False):
+    """
+    Return the Graph for the dataset in `directory`, reading it from the
+    snapshot when one matches the current CSVs.
+
+    Otherwise `load(directory)` is called to build the graph from the
+    CSVs and a fresh snapshot is written. `rebuild` forces the latter.
+    """
+    path = snapshot_path(directory)
+    fingerprint = source_fingerprint(directory)
+    if not rebuild:
+        graph = load_snapshot(path, fingerprint)
+        if graph is not None:
+            return graph
+
+    graph = load(directory)
+    try:
+        save_snapshot(graph, path, fingerprint)
+    except OSError:
+        # A read-only data directory only costs us the cache
+        pass
+    return graph
+
+
+def _read_header(mapped):
+    """
+    Parse and return the JSON header of a snapshot and the offset at which
+    its sections start, raising ValueError if the file is not a snapshot.
+    """
+    if len(mapped) < len(MAGIC) + 16 or mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a degrees snapshot")
+    (headerLength,) = struct.unpack_from("<Q", mapped, len(MAGIC))
+    headerStart = len(MAGIC) + 8
+    try:
+        header = json.loads(bytes(mapped[headerStart:headerStart + headerLength]))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("corrupt snapshot header")
+    if header.get("version") != VERSION:
+        raise ValueError("unsupported snapshot version")
+
+    # The data offset is repeated at the end of the file, so a truncated
+    # write is never mistaken for a complete snapshot
+    dataStart = _padded(headerStart + headerLength)
+    (trailer,) = struct.unpack_from("<Q", mapped, len(mapped) - 8)
+    if trailer != dataStart:
+        raise ValueError("truncated snapshot")
+    return header, dataStart
+
+
+def _padded(length):
+    """
+    Round `length` up to a multiple of 8 bytes.
+    """
+    return (length + 7) & ~7
@@ -0,0 +1,113 @@
+import argparse
+import csv
+import math
+import os
+import random
+
+FIRST_NAMES = [
+    "Alex", "Anna", "Ben", "Carla", "Chris", "Dana", "David", "Elena", "Emma",
+    "Frank", "Grace", "Hana", "Ian", "Jack", "Julia", "Kevin", "Laura", "Leo",
+    "Maria", "Mark", "Nina", "Omar", "Paul", "Rosa", "Sam", "Sara", "Tom",
+    "Uma", "Victor", "Wei", "Yuki", "Zoe",
+]
+
+LAST_NAMES = [
+    "Adams", "Baker", "Chen", "Cruz", "Davis", "Evans", "Fischer", "Garcia",
+    "Hall", "Ito", "Jones", "Khan", "Kim", "Lopez", "Martin", "Moore", "Novak",
+    "Okafor", "Patel", "Quinn", "Rossi", "Silva", "Smith", "Tanaka", "Usman",
+    "Vargas", "Weber", "Walker", "Xu", "Young", "Zhang",
+]
+
+
+def generate(directory, people, credits=3.0, cast_alpha=1.8, max_cast=200,
+             popularity=3.0, seed=None):
+    """
+    Write people.csv, movies.csv and stars.csv for a synthetic dataset of
+    `people` people into `directory`.
+
+    Cast sizes follow a Pareto (power-law) distribution with exponent
+    `cast_alpha`, from 2 up to `max_cast`, and the number of movies is
+    chosen so that people have `credits` credits on average. Stars are
+    drawn with a skew of `popularity`, so a few people appear in many
+    movies and most in one or two, as in the IMDB data. Names are drawn
+    from small lists, so many of them are shared.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Spread popular people over the id space with a multiplicative bijection
+    stride = _coprime_stride(people)
+
+    def person_id(index):
+        return str(1 + (index * stride) % people)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for index in range(people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            writer.writerow([index + 1, name, rng.randint(1900, 2005)])
+
+    meanCast = cast_alpha / (cast_alpha - 1) * 2 if cast_alpha > 1 else max_cast / 2
+    numMovies = max(1, int(people * credits / meanCast))
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as movieFile, \
+            open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as starFile:
+        movieWriter = csv.writer(movieFile)
+        starWriter = csv.writer(starFile)
+        movieWriter.writerow(["id", "title", "year"])
+        starWriter.writerow(["person_id", "movie_id"])
+        for movie in range(1, numMovies + 1):
+            movieWriter.writerow([movie, f"Movie {movie}", rng.randint(1920, 2020)])
+            cast = min(max_cast, people, int(2 * rng.paretovariate(cast_alpha)))
+            stars = set()
+            draws = 0
+            while len(stars) < cast:
+                # Fall back to uniform draws once the popular people run out
+                if draws < 4 * cast:
+                    stars.add(int(people * rng.random() ** popularity))
+                else:
+                    stars.add(rng.randrange(people))
+                draws += 1
+            for index in stars:
+                starWriter.writerow([person_id(index), movie])
+
+    return {"people": people, "movies": numMovies}
+
+
+def _coprime_stride(n):
+    """
+    Return a large stride that is coprime with `n`, so that
+    index * stride mod n is a permutation of range(n).
+    """
+    stride = int(n * 0.6180339887) | 1
+    while math.gcd(stride, n) != 1:
+        stride += 2
+    return stride
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic degrees dataset with power-law cast sizes."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--credits", type=float, default=3.0,
+                        help="mean number of credits per person")
+    parser.add_argument("--cast-alpha", type=float, default=1.8,
+                        help="Pareto exponent of the cast size distribution")
+    parser.add_argument("--max-cast", type=int, default=200)
+    parser.add_argument("--popularity", type=float, default=3.0,
+                        help="skew of how often each person is cast")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    sizes = generate(
+        args.directory, args.people, args.credits, args.cast_alpha,
+        args.max_cast, args.popularity, args.seed
+    )
+    print(f"Wrote {sizes['people']} people and {sizes['movies']} movies to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
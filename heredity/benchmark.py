@@ -0,0 +1,126 @@
+import argparse
+import csv
+import os
+import random
+import time
+
+from heredity import enumerate_probabilities, load_data, marginalized_probabilities
+from inference import infer_probabilities
+
+
+def synthetic_pedigree(size, observed=0.5, seed=None):
+    """
+    Return a pedigree of `size` people in the format of load_data.
+
+    People are added one at a time, either as a child of an existing couple
+    or as a founder who forms a couple with someone not yet in one, so the
+    pedigree has no loops. Each person's trait is observed with probability
+    `observed`, and is present for about one observed person in five.
+    """
+    rng = random.Random(seed)
+    people = {}
+    couples = []
+    single = []
+
+    for i in range(size):
+        name = f"P{i}"
+        mother = father = None
+        if couples and (not single or rng.random() < 0.6):
+            mother, father = rng.choice(couples)
+            single.append(name)
+        elif single:
+            partner = single.pop(rng.randrange(len(single)))
+            couples.append((partner, name))
+        else:
+            single.append(name)
+
+        trait = None
+        if rng.random() < observed:
+            trait = rng.random() < 0.2
+        people[name] = {"name": name, "mother": mother, "father": father, "trait": trait}
+    return people
+
+
+def write_pedigree(people, filename):
+    """
+    Write `people` to `filename` as a CSV file that load_data can read.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "mother", "father", "trait"])
+        for person in people.values():
+            trait = "" if person["trait"] is None else int(person["trait"])
+            writer.writerow([person["name"], person["mother"] or "", person["father"] or "", trait])
+
+
+def max_difference(a, b):
+    """
+    Return the largest difference between two sets of probabilities.
+    """
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a
+        for field in a[person]
+        for value in a[person][field]
+    )
+
+
+def compare(name, people, engines, limits):
+    """
+    Times each engine on `people` and checks that they agree. Engines are
+    skipped for families larger than their entry in `limits`.
+    """
+    print(f"{name}: {len(people)} people, "
+          f"{sum(1 for p in people.values() if p['trait'] is None)} unknown traits")
+    results = {}
+    for engine, function in engines.items():
+        if engine in limits and len(people) > limits[engine]:
+            print(f"  {engine:13}: skipped")
+            continue
+        start = time.perf_counter()
+        results[engine] = function(people)
+        print(f"  {engine:13}: {time.perf_counter() - start:.4f}s")
+    if len(results) > 1:
+        reference = next(iter(results.values()))
+        difference = max(max_difference(reference, other) for other in results.values())
+        print(f"  max difference: {difference:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the heredity inference engines.")
+    parser.add_argument("files", nargs="*",
+                        default=["data/family0.csv", "data/family1.csv", "data/family2.csv"])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[4, 6, 12, 50, 200, 400, 1000],
+                        help="sizes of the synthetic pedigrees")
+    parser.add_argument("--observed", type=float, default=0.5,
+                        help="fraction of synthetic people whose trait is known")
+    parser.add_argument("--max-enumeration", type=int, default=6,
+                        help="largest family to run the enumeration on")
+    parser.add_argument("--max-marginalized", type=int, default=9,
+                        help="largest family to run the gene-only enumeration on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="DIRECTORY",
+                        help="also write the synthetic pedigrees as CSV files to DIRECTORY")
+    args = parser.parse_args()
+
+    engines = {
+        "enumeration": enumerate_probabilities,
+        "marginalized": marginalized_probabilities,
+        "elimination": infer_probabilities,
+    }
+    limits = {
+        "enumeration": args.max_enumeration,
+        "marginalized": args.max_marginalized,
+    }
+    for filename in args.files:
+        compare(filename, load_data(filename), engines, limits)
+    for size in args.sizes:
+        people = synthetic_pedigree(size, args.observed, args.seed)
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            write_pedigree(people, os.path.join(args.save, f"synthetic{size}.csv"))
+        compare("synthetic", people, engines, limits)
+
+
+if __name__ == "__main__":
+    main()
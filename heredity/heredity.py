@@ -1,6 +1,6 @@
+import argparse
 import csv
 import itertools
-import sys
 
 PROBS = {
 
@@ -38,11 +38,43 @@ PROBS = {
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for a family."
+    )
+    parser.add_argument("data", help="CSV file of the family")
+    parser.add_argument(
+        "--engine", choices=["enumeration", "marginalized", "elimination"],
+        default="enumeration",
+        help="enumerate every joint assignment, enumerate gene assignments only, "
+             "or run variable elimination"
+    )
+    args = parser.parse_args()
+    people = load_data(args.data)
+
+    if args.engine == "marginalized":
+        probabilities = marginalized_probabilities(people)
+    elif args.engine == "elimination":
+        from inference import infer_probabilities
+        probabilities = infer_probabilities(people)
+    else:
+        probabilities = enumerate_probabilities(people)
 
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    conditioned on the observed traits, by summing the joint probability
+    of every assignment of genes and traits.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -83,15 +115,69 @@ def main():
     
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
+
+def marginalized_probabilities(people):
+    """
+    Return the same probabilities as enumerate_probabilities, enumerating
+    only the assignments of genes.
+
+    Nobody's gene count depends on a trait, so an unknown trait can be
+    summed out of every joint probability in closed form: it contributes
+    a factor of 1 to the joint, and splits that person's share of the
+    probability between True and False according to PROBS["trait"].
+    """
+    probabilities = {
+        person: {
+            "gene": {
+                2: 0,
+                1: 0,
+                0: 0
+            },
+            "trait": {
+                True: 0,
+                False: 0
+            }
+        }
+        for person in people
+    }
+
+    names = set(people)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+            p = gene_probability(people, one_gene, two_genes)
+            counts = gene_counts(people, one_gene, two_genes)
+            for person in people:
+                genes = counts[person]
+                probabilities[person]["gene"][genes] += p
+                trait = people[person]["trait"]
+                if trait is not None:
+                    probabilities[person]["trait"][trait] += p
+                else:
+                    for value in (True, False):
+                        probabilities[person]["trait"][value] += p * PROBS["trait"][genes][value]
+
+    normalize(probabilities)
+    return probabilities
+
+
+def gene_probability(people, one_gene, two_genes):
+    """
+    Compute and return the joint probability that everyone in `one_gene`
+    has one copy of the gene, everyone in `two_genes` has two, everyone
+    else has none, and everyone whose trait is known has that trait.
+    Unknown traits are summed out.
+    """
+    genes = gene_counts(people, one_gene, two_genes)
+    jointProb = 1
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        prob = gene_given_parents(people, person, genes)
+        trait = people[person]["trait"]
+        if trait is not None:
+            prob = prob * PROBS["trait"][genes[person]][trait]
+        jointProb = jointProb * prob
+    return jointProb
 
 
 def load_data(filename):
@@ -139,61 +225,55 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
-    jointProb = 1 # The variable to return
+    genes = gene_counts(people, one_gene, two_genes)
+    jointProb = 1
+    for person in people:
+        prob = gene_given_parents(people, person, genes)
+        prob = prob * PROBS["trait"][genes[person]][person in have_trait]
+        jointProb = jointProb * prob
+    return jointProb
 
-    peopleInfo = {
-        person: {
-            "gene": 0,
-            "trait": False,
-            "passOn": 0
-        }
+
+def gene_counts(people, one_gene, two_genes):
+    """
+    Return a dictionary giving the number of copies of the gene each
+    person has: two for `two_genes`, one for `one_gene`, none otherwise.
+    """
+    return {
+        person: (2 if person in two_genes else 1 if person in one_gene else 0)
         for person in people
     }
 
-    x = PROBS['mutation']
 
-    for person in people:
-        if person in two_genes:
-            peopleInfo[person]['gene'] = 2
-            peopleInfo[person]['passOn'] = 1 - x
-        elif person in one_gene:
-            peopleInfo[person]['gene'] = 1
-            peopleInfo[person]['passOn'] = 0.5
-        else:
-            peopleInfo[person]['passOn'] = x
-        
-        if person in have_trait:
-            peopleInfo[person]['trait'] = True
-        else:
-            pass
-
-    for person in people:
-        numGenes = peopleInfo[person]['gene']
-        hasTrait = peopleInfo[person]['trait']
+def gene_given_parents(people, person, genes):
+    """
+    Return the probability that `person` has the number of copies of the
+    gene given by `genes`: the unconditional probability if their parents
+    are not known, otherwise the probability of inheriting that many
+    copies from parents with the numbers of copies in `genes`.
+    """
+    father = people[person]["father"]
+    if not father:
+        return PROBS["gene"][genes[person]]
+    mother = people[person]["mother"]
+    return inherit_probability(genes[person], genes[mother], genes[father])
 
-        # If their parents are not known
-        if not people[person]['father']:
-            prob = PROBS["gene"][numGenes] * PROBS["trait"][numGenes][hasTrait]
-    
-        # If their parents are known
-        else:
-            father = people[person]['father']
-            fPassesOn = peopleInfo[father]['passOn']
-            mother = people[person]['mother']
-            mPassesOn = peopleInfo[mother]['passOn']
-
-            if numGenes == 2:
-                prob = fPassesOn * mPassesOn
-            elif numGenes == 1:
-                prob = (fPassesOn * (1 - mPassesOn)) + (mPassesOn * (1 - fPassesOn))
-            else:
-                prob = (1 - fPassesOn) * (1 - mPassesOn)
-
-            prob = prob * PROBS["trait"][numGenes][hasTrait]
-        
-        jointProb = jointProb * prob
 
-    return jointProb
+def inherit_probability(genes, motherGenes, fatherGenes):
+    """
+    Return the probability that a child has `genes` copies of the gene
+    given the number of copies each parent has. Each parent passes the
+    gene on with probability 0.5 per copy they have, subject to mutation.
+    """
+    x = PROBS["mutation"]
+    passOn = {0: x, 1: 0.5, 2: 1 - x}
+    mPassesOn = passOn[motherGenes]
+    fPassesOn = passOn[fatherGenes]
+    if genes == 2:
+        return fPassesOn * mPassesOn
+    if genes == 1:
+        return (fPassesOn * (1 - mPassesOn)) + (mPassesOn * (1 - fPassesOn))
+    return (1 - fPassesOn) * (1 - mPassesOn)
 
     
 
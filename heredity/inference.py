@@ -0,0 +1,257 @@
+import heapq
+import itertools
+
+from heredity import inherit_probability, PROBS
+
+GENES = (0, 1, 2)
+TRAITS = (True, False)
+
+
+def domain(variable):
+    """
+    Return the values a ("gene", person) or ("trait", person) variable
+    can take.
+    """
+    return GENES if variable[0] == "gene" else TRAITS
+
+
+def pedigree_factors(people):
+    """
+    Return the factors of the Bayesian network for `people`: one factor
+    per person giving the distribution of their gene count given their
+    parents' gene counts, and one linking their trait to their gene count.
+
+    A factor is a pair (variables, table), where `table` maps every tuple
+    of values of `variables` to a probability. Observed traits are entered
+    as evidence, so their factors only range over the gene count.
+    """
+    factors = []
+    for person in people:
+        gene = ("gene", person)
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if not father:
+            factors.append(((gene,), {(g,): PROBS["gene"][g] for g in GENES}))
+        else:
+            variables = (gene, ("gene", mother), ("gene", father))
+            factors.append((variables, {
+                (g, m, f): inherit_probability(g, m, f)
+                for g, m, f in itertools.product(GENES, GENES, GENES)
+            }))
+
+        trait = people[person]["trait"]
+        if trait is None:
+            factors.append(((("trait", person), gene), {
+                (t, g): PROBS["trait"][g][t]
+                for t, g in itertools.product(TRAITS, GENES)
+            }))
+        else:
+            factors.append(((gene,), {(g,): PROBS["trait"][g][trait] for g in GENES}))
+    return factors
+
+
+def multiply(factors):
+    """
+    Return the product of `factors` as a single factor.
+    """
+    variables = []
+    for factorVariables, table in factors:
+        for variable in factorVariables:
+            if variable not in variables:
+                variables.append(variable)
+    positions = [
+        [variables.index(variable) for variable in factorVariables]
+        for factorVariables, table in factors
+    ]
+
+    product = {}
+    for values in itertools.product(*(domain(variable) for variable in variables)):
+        p = 1
+        for (factorVariables, table), indexes in zip(factors, positions):
+            p *= table[tuple(values[i] for i in indexes)]
+        product[values] = p
+    return tuple(variables), product
+
+
+def sum_out(variable, factor):
+    """
+    Return `factor` with `variable` summed out.
+    """
+    variables, table = factor
+    i = variables.index(variable)
+    summed = {}
+    for values, p in table.items():
+        key = values[:i] + values[i + 1:]
+        summed[key] = summed.get(key, 0) + p
+    return variables[:i] + variables[i + 1:], summed
+
+
+def min_fill_order(factors, keep):
+    """
+    Return an elimination order for every variable of `factors` not in
+    `keep`, choosing each time the variable whose elimination adds the
+    fewest new edges between its neighbours (ties broken by the fewest
+    neighbours).
+    """
+    neighbours = {}
+    for variables, table in factors:
+        for variable in variables:
+            neighbours.setdefault(variable, set()).update(variables)
+    for variable in neighbours:
+        neighbours[variable].discard(variable)
+
+    def score(variable):
+        adjacent = list(neighbours[variable])
+        fill = sum(
+            1 for a, b in itertools.combinations(adjacent, 2)
+            if b not in neighbours[a]
+        )
+        return fill, len(adjacent), repr(variable)
+
+    # Eliminating a variable only changes the scores of its neighbours and
+    # of their neighbours, so scores are kept in a heap and stale entries
+    # are skipped when popped
+    remaining = set(neighbours) - set(keep)
+    scores = {variable: score(variable) for variable in remaining}
+    heap = [(key, variable) for variable, key in scores.items()]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        key, variable = heapq.heappop(heap)
+        if variable not in remaining or scores[variable] != key:
+            continue
+        adjacent = neighbours.pop(variable)
+        affected = set(adjacent)
+        for a in adjacent:
+            neighbours[a].discard(variable)
+            neighbours[a].update(adjacent - {a})
+        for a in adjacent:
+            affected.update(neighbours[a])
+        remaining.remove(variable)
+        order.append(variable)
+        for a in affected & remaining:
+            scores[a] = score(a)
+            heapq.heappush(heap, (scores[a], a))
+    return order
+
+
+def message(factors, variables):
+    """
+    Return the product of `factors` with every variable not in `variables`
+    summed out, scaled to sum to 1 so that long chains of messages do not
+    underflow.
+    """
+    factor = multiply(factors)
+    for variable in factor[0]:
+        if variable not in variables:
+            factor = sum_out(variable, factor)
+    variables, table = factor
+    total = sum(table.values())
+    return variables, {values: p / total for values, p in table.items()}
+
+
+def elimination_tree(factors, order):
+    """
+    Return the elimination tree for eliminating every variable of
+    `factors` in `order`, with one clique per variable in that order.
+
+    The result is three lists indexed by clique: the variables multiplied
+    together when eliminating the clique's variable, the factors of
+    `factors` assigned to it (each factor goes to the clique of its first
+    eliminated variable), and the clique its message is sent to, that of
+    the first eliminated variable of the message (None for a root).
+    """
+    position = {variable: i for i, variable in enumerate(order)}
+    assigned = [[] for variable in order]
+    for factor in factors:
+        assigned[min(position[variable] for variable in factor[0])].append(factor)
+
+    scopes = [set() for variable in order]
+    parents = []
+    for i, variable in enumerate(order):
+        for variables, table in assigned[i]:
+            scopes[i].update(variables)
+        separator = scopes[i] - {variable}
+        if separator:
+            parent = min(position[v] for v in separator)
+            scopes[parent].update(separator)
+            parents.append(parent)
+        else:
+            parents.append(None)
+    return scopes, assigned, parents
+
+
+def calibrate(factors, order):
+    """
+    Return the belief of every clique of the elimination tree for `order`,
+    a factor proportional to the joint distribution of its variables, by
+    passing messages up the tree and back down (Shafer-Shenoy), so that
+    one pass over the tree serves every query.
+    """
+    scopes, assigned, parents = elimination_tree(factors, order)
+    children = [[] for variable in order]
+    for i, parent in enumerate(parents):
+        if parent is not None:
+            children[parent].append(i)
+
+    # Children come before their parent in the elimination order
+    upward = [None] * len(order)
+    for i, parent in enumerate(parents):
+        if parent is not None:
+            incoming = assigned[i] + [upward[child] for child in children[i]]
+            upward[i] = message(incoming, scopes[i] & scopes[parent])
+
+    downward = [None] * len(order)
+    beliefs = [None] * len(order)
+    for i in reversed(range(len(order))):
+        incoming = [upward[child] for child in children[i]]
+        rest = list(assigned[i])
+        if parents[i] is not None:
+            rest.append(downward[i])
+        beliefs[i] = multiply(rest + incoming)
+        for k, child in enumerate(children[i]):
+            others = rest + incoming[:k] + incoming[k + 1:]
+            downward[child] = message(others, scopes[child] & scopes[i])
+    return beliefs
+
+
+def infer_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    conditioned on the observed traits, by variable elimination over the
+    pedigree's Bayesian network.
+
+    Rather than eliminating again for every person, the elimination tree
+    of one min-fill order is calibrated once, and each distribution is
+    read off a clique holding the person's variables.
+
+    The result has the same structure as the `probabilities` computed in
+    heredity.main by enumeration.
+    """
+    factors = pedigree_factors(people)
+    order = min_fill_order(factors, ())
+    position = {variable: i for i, variable in enumerate(order)}
+    beliefs = calibrate(factors, order)
+
+    probabilities = {}
+    for person in people:
+        gene = ("gene", person)
+        trait = ("trait", person)
+        observed = people[person]["trait"]
+        keep = [gene] if observed is not None else [gene, trait]
+
+        # The clique of whichever variable goes first holds them both,
+        # since the two share a factor
+        belief = beliefs[min(position[variable] for variable in keep)]
+        variables, table = message([belief], keep)
+        genes = {g: 0 for g in (2, 1, 0)}
+        traits = {True: 0, False: 0}
+        for values, p in table.items():
+            assignment = dict(zip(variables, values))
+            genes[assignment[gene]] += p
+            if observed is None:
+                traits[assignment[trait]] += p
+        if observed is not None:
+            traits[observed] = 1
+        probabilities[person] = {"gene": genes, "trait": traits}
+    return probabilities
@@ -0,0 +1,372 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from compact import CompactCorpus, save_compact
+from matrix import (
+    apply_link_delta, IncrementalPageRank, link_matrix, matrix_pagerank,
+    personalized_pagerank
+)
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank
+from solvers import solve, solve_pagerank, SOLVERS
+from sampling import fast_sample_pagerank, multi_chain_pagerank
+from synthetic import generate
+
+SECTIONS = ["samplers", "personalized", "incremental", "solvers", "dangling", "scale"]
+
+
+def iteration_engines(corpus, compact):
+    """
+    Return a dictionary from engine name to a function ranking `corpus`
+    (or its compact form `compact`) by iteration.
+    """
+    engines = {
+        "dict": lambda: iterate_pagerank(corpus, DAMPING),
+        "matrix": lambda: matrix_pagerank(corpus, DAMPING),
+        "compact": lambda: iterate_pagerank(compact, DAMPING),
+    }
+    for method in SOLVERS:
+        engines[method] = lambda method=method: solve_pagerank(corpus, DAMPING, method)[0]
+    return engines
+
+
+def sampling_engines(corpus, compact, samples, seed=None):
+    """
+    Return a dictionary from engine name to a function ranking `corpus`
+    (or its compact form `compact`) from `samples` samples.
+    """
+    def dict_sampler():
+        random.seed(seed)
+        return sample_pagerank(corpus, DAMPING, samples)
+
+    def compact_sampler():
+        random.seed(seed)
+        return sample_pagerank(compact, DAMPING, samples)
+
+    return {
+        "dict": dict_sampler,
+        "fast": lambda: fast_sample_pagerank(corpus, DAMPING, samples, seed),
+        "chains": lambda: multi_chain_pagerank(corpus, DAMPING, samples, seed=seed)[0],
+        "compact": compact_sampler,
+    }
+
+
+def measure(function):
+    """
+    Run `function` twice, untraced to time it and under tracemalloc to
+    find its peak memory, and return its result, the time in seconds and
+    the peak in bytes.
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def dangling_corpus(numPages, linkedFraction=0.05, links=5, seed=None):
+    """
+    Return a corpus of `numPages` pages where only `linkedFraction` of
+    the pages have links (`links` each) and the rest are dangling.
+    """
+    rng = random.Random(seed)
+    pages = [f"{i}.html" for i in range(numPages)]
+    corpus = {page: set() for page in pages}
+    for page in rng.sample(pages, max(1, int(numPages * linkedFraction))):
+        corpus[page] = set(rng.sample(pages, min(links, numPages))) - {page}
+    return corpus
+
+
+def expand_dangling(corpus):
+    """
+    Return a copy of `corpus` in which every page without links links to
+    every page, as iterate_pagerank used to do to the corpus it was given.
+    """
+    expanded = copy.deepcopy(corpus)
+    allPages = set(corpus)
+    for page in expanded:
+        if not expanded[page]:
+            expanded[page] = set(allPages)
+    return expanded
+
+
+def compare_dangling(numPages, seed=None):
+    """
+    Times iterate_pagerank on a mostly dangling corpus against the same
+    corpus with the dangling edges written out, and checks that the
+    input is left untouched and that both give the same ranks.
+    """
+    corpus = dangling_corpus(numPages, seed=seed)
+    before = copy.deepcopy(corpus)
+
+    start = time.perf_counter()
+    ranks = iterate_pagerank(corpus, DAMPING)
+    correctionTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expanded = expand_dangling(corpus)
+    numEdges = sum(len(links) for links in expanded.values())
+    expandedRanks = iterate_pagerank(expanded, DAMPING)
+    expandedTime = time.perf_counter() - start
+
+    difference = sum(abs(ranks[page] - expandedRanks[page]) for page in corpus)
+    print(f"Pages: {numPages} ({sum(1 for links in corpus.values() if not links)} dangling)")
+    print(f"  rank-one correction: {correctionTime:.3f}s")
+    print(f"  expanded edges:      {expandedTime:.3f}s ({numEdges} edges)")
+    print(f"  L1 difference:       {difference:.6f}")
+    print(f"  corpus unchanged:    {corpus == before}")
+
+
+def compare_samplers(directory, samples, chains=4, seed=None):
+    """
+    Times sample_pagerank against fast_sample_pagerank on the corpus in
+    `directory`, and reports how far each estimate is from the iterated ranks.
+    """
+    corpus = crawl(directory)
+    reference = iterate_pagerank(corpus, DAMPING)
+    print(f"Corpus: {directory} ({len(corpus)} pages, n = {samples})")
+
+    random.seed(seed)
+    start = time.perf_counter()
+    ranks = sample_pagerank(corpus, DAMPING, samples)
+    elapsed = time.perf_counter() - start
+    difference = sum(abs(ranks[page] - reference[page]) for page in corpus)
+    print(f"  transition model: {elapsed:.3f}s (L1 to iteration {difference:.4f})")
+
+    start = time.perf_counter()
+    ranks = fast_sample_pagerank(corpus, DAMPING, samples, seed)
+    elapsed = time.perf_counter() - start
+    difference = sum(abs(ranks[page] - reference[page]) for page in corpus)
+    print(f"  link arrays:      {elapsed:.3f}s (L1 to iteration {difference:.4f})")
+
+    start = time.perf_counter()
+    ranks, diagnostics = multi_chain_pagerank(corpus, DAMPING, samples, chains, seed=seed)
+    elapsed = time.perf_counter() - start
+    difference = sum(abs(ranks[page] - reference[page]) for page in corpus)
+    print(f"  {chains} chains:         {elapsed:.3f}s (L1 to iteration {difference:.4f}, "
+          f"max stderr {max(diagnostics['stderr'].values()):.4f})")
+
+
+def compare_personalized(numPages, numSets, setSize=5, seed=None):
+    """
+    Times solving `numSets` personalized PageRanks in one batched call
+    against solving them one at a time, and checks both agree.
+    """
+    rng = random.Random(seed)
+    corpus = dangling_corpus(numPages, linkedFraction=0.9, links=8, seed=seed)
+    pages = sorted(corpus)
+    seedSets = [rng.sample(pages, setSize) for _ in range(numSets)]
+
+    start = time.perf_counter()
+    batched = personalized_pagerank(corpus, DAMPING, seedSets)
+    batchedTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [personalized_pagerank(corpus, DAMPING, [seedSet])[0] for seedSet in seedSets]
+    singleTime = time.perf_counter() - start
+
+    difference = max(
+        sum(abs(a[page] - b[page]) for page in corpus)
+        for a, b in zip(batched, single)
+    )
+    print(f"Personalized: {numPages} pages, {numSets} seed sets")
+    print(f"  batched:     {batchedTime:.3f}s")
+    print(f"  one by one:  {singleTime:.3f}s")
+    print(f"  max L1 difference: {difference:.2e}")
+
+
+def random_delta(corpus, changes, seed=None):
+    """
+    Return `changes` random (page, link) pairs to add and `changes`
+    existing links to remove from `corpus`.
+    """
+    rng = random.Random(seed)
+    pages = sorted(corpus)
+    links = sorted((page, link) for page in pages for link in corpus[page])
+    added = []
+    while len(added) < changes:
+        page, link = rng.choice(pages), rng.choice(pages)
+        if page != link and link not in corpus[page]:
+            added.append((page, link))
+    removed = rng.sample(links, min(changes, len(links)))
+    return added, removed
+
+
+def compare_incremental(name, corpus, changes, tolerances, seed=None):
+    """
+    Compares bringing the ranks of `corpus` up to date after a random
+    change of `changes` links with IncrementalPageRank against ranking
+    the changed corpus from scratch, stopping both on the L1 residual.
+    """
+    added, removed = random_delta(corpus, changes, seed)
+    updated = apply_link_delta(corpus, added, removed)
+    reference = matrix_pagerank(updated, DAMPING, 1e-13)
+    print(f"Incremental: {name} ({len(corpus)} pages, {changes} links added and removed)")
+    for tolerance in tolerances:
+        index = IncrementalPageRank(corpus, DAMPING, tolerance)
+        start = time.perf_counter()
+        pushes = index.update(added, removed)
+        ranks = index.ranks()
+        incrementalTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pages, matrix, dangling = link_matrix(apply_link_delta(corpus, added, removed))
+        coldRanks, trace = solve(matrix, dangling, DAMPING, "power", "l1", tolerance)
+        coldRanks = dict(zip(pages, coldRanks))
+        coldTime = time.perf_counter() - start
+
+        error = sum(abs(ranks[page] - reference[page]) for page in updated)
+        coldError = sum(abs(coldRanks[page] - reference[page]) for page in updated)
+        print(f"  tolerance {tolerance:g}: {pushes} pushes ({incrementalTime:.4f}s, L1 error {error:.2e}), "
+              f"cold {len(trace)} iterations x {len(updated)} pages "
+              f"({coldTime:.4f}s, L1 error {coldError:.2e})")
+
+
+def compare_solvers(name, corpus, tolerance=1e-10):
+    """
+    Reports the iterations, time and error of every solver on `corpus`,
+    stopping on the L1 residual, against a tightly converged reference.
+    """
+    reference = matrix_pagerank(corpus, DAMPING, 1e-14)
+    print(f"Solvers: {name} ({len(corpus)} pages, L1 residual <= {tolerance:g})")
+    for method in SOLVERS:
+        ranks, trace = solve_pagerank(corpus, DAMPING, method, "l1", tolerance)
+        difference = sum(abs(ranks[page] - reference[page]) for page in corpus)
+        print(f"  {method:12}: {len(trace):4} iterations, {trace[-1][2]:.3f}s, "
+              f"L1 to reference {difference:.2e}")
+
+
+def scale(sizes, sampleCounts, maxWork=2e7, seed=None):
+    """
+    Ranks synthetic preferential-attachment corpora of every size in
+    `sizes` with every engine, iterating and sampling `sampleCounts`
+    samples, and reports time, peak memory and L1 distance to a tightly
+    converged reference. The original sampler is skipped once pages times
+    samples exceeds `maxWork`, as its cost grows with both.
+
+    Returns a list with one record per run.
+    """
+    results = []
+    for numPages in sizes:
+        corpus = generate(numPages, seed=seed)
+        reference = matrix_pagerank(corpus, DAMPING, 1e-12)
+        numLinks = sum(len(links) for links in corpus.values())
+        print(f"Scale: {numPages} pages, {numLinks} links")
+
+        with tempfile.TemporaryDirectory() as directory:
+            save_compact(corpus, directory)
+            compact = CompactCorpus.open(directory)
+
+            runs = [(None, iteration_engines(corpus, compact))]
+            for samples in sampleCounts:
+                runs.append((samples, sampling_engines(corpus, compact, samples, seed)))
+
+            for samples, engines in runs:
+                for name, function in engines.items():
+                    record = {"pages": numPages, "links": numLinks,
+                              "engine": name, "samples": samples}
+                    label = name if samples is None else f"{name} sampler (n = {samples})"
+                    if samples is not None and name == "dict" and numPages * samples > maxWork:
+                        print(f"  {label:32}: skipped")
+                        continue
+                    ranks, elapsed, peak = measure(function)
+                    difference = sum(abs(ranks[page] - reference[page]) for page in corpus)
+                    record.update(seconds=elapsed, peak_bytes=peak, l1=difference)
+                    results.append(record)
+                    print(f"  {label:32}: {elapsed:8.3f}s, peak {peak / 2 ** 20:7.1f} MiB, "
+                          f"L1 to reference {difference:.2e}")
+    return results
+
+
+def environment():
+    """
+    Returns the commit, Python version and time of this run, so results
+    can be compared across commits.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PageRank engines.")
+    parser.add_argument("--dangling", type=int, nargs="*", default=[250, 500, 1000],
+                        metavar="PAGES",
+                        help="sizes of the mostly dangling corpora to rank")
+    parser.add_argument("--corpora", nargs="*", default=["corpus0", "corpus1", "corpus2"],
+                        metavar="DIRECTORY",
+                        help="corpora on which to compare the samplers")
+    parser.add_argument("--samples", type=int, default=100000)
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--personalized", type=int, nargs="*", default=[100, 500],
+                        metavar="SETS",
+                        help="numbers of seed sets to solve on a 10000 page corpus")
+    parser.add_argument("--changes", type=int, default=1,
+                        help="links added and removed in the incremental benchmark")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000],
+                        metavar="PAGES",
+                        help="sizes of the synthetic corpora in the scale benchmark")
+    parser.add_argument("--sample-counts", type=int, nargs="*", default=[10000, 100000],
+                        metavar="SAMPLES",
+                        help="samples taken by each sampler in the scale benchmark")
+    parser.add_argument("--max-work", type=float, default=2e7,
+                        help="largest pages x samples given to the original sampler")
+    parser.add_argument("--sections", nargs="*", choices=SECTIONS, default=SECTIONS,
+                        help="parts of the benchmark to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the scale results to FILE as JSON")
+    args = parser.parse_args()
+
+    if "samplers" in args.sections:
+        for directory in args.corpora:
+            compare_samplers(directory, args.samples, args.chains, args.seed)
+    if "personalized" in args.sections:
+        for numSets in args.personalized:
+            compare_personalized(10000, numSets, seed=args.seed)
+    corpus = dangling_corpus(10000, linkedFraction=0.9, links=8, seed=args.seed)
+    if "incremental" in args.sections:
+        tolerances = [1e-6, 1e-10]
+        for directory in args.corpora:
+            compare_incremental(directory, crawl(directory), args.changes, tolerances, args.seed)
+        compare_incremental("random", corpus, args.changes, tolerances, args.seed)
+        compare_incremental("synthetic", generate(100000, seed=args.seed), args.changes,
+                            tolerances, args.seed)
+    if "solvers" in args.sections:
+        for directory in args.corpora:
+            compare_solvers(directory, crawl(directory))
+        compare_solvers("random", corpus)
+    if "dangling" in args.sections:
+        for numPages in args.dangling:
+            compare_dangling(numPages, args.seed)
+
+    if "scale" in args.sections:
+        results = scale(args.sizes, args.sample_counts, args.max_work, args.seed)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"environment": environment(), "scale": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import sys
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+
+from crawler import parse_page
+from sampling import random_surfer
+
+# Bump when the file layout changes, so that old corpora are rejected
+VERSION = 1
+HEADER_NAME = "compact.json"
+PAGES_NAME = "pages.txt"
+OFFSETS_NAME = "offsets.bin"
+TARGETS_NAME = "targets.bin"
+
+# Number of links whose rank contributions are added up at a time
+BLOCK = 1 << 20
+
+
+class CompactCorpus(Mapping):
+    """
+    A corpus stored as a page table and compressed-sparse-row link arrays
+    on disk: the links of page i are the page ids
+    targets[offsets[i]:offsets[i + 1]], and page ids index `pages`.
+
+    The link arrays are opened with numpy.memmap, so only the pages being
+    visited are read into memory. It can be used as a read-only corpus
+    dictionary, mapping every page name to the set of pages it links to,
+    and is accepted directly by sample_pagerank and iterate_pagerank.
+    """
+    def __init__(self, pages, offsets, targets):
+        self.pages = pages
+        self.offsets = offsets
+        self.targets = targets
+        self._index = None
+
+    @classmethod
+    def open(cls, directory):
+        """
+        Open the compact corpus written to `directory`.
+        """
+        with open(os.path.join(directory, HEADER_NAME)) as f:
+            header = json.load(f)
+        if header.get("version") != VERSION:
+            raise ValueError(f"{directory} holds an unsupported compact corpus")
+        with open(os.path.join(directory, PAGES_NAME), encoding="utf-8") as f:
+            pages = [sys.intern(line.rstrip("\n")) for line in f]
+        if len(pages) != header["pages"]:
+            raise ValueError(f"{directory} holds a truncated page table")
+        offsets = np.memmap(
+            os.path.join(directory, OFFSETS_NAME), dtype=np.int64, mode="r",
+            shape=(header["pages"] + 1,)
+        )
+        targets = np.memmap(
+            os.path.join(directory, TARGETS_NAME), dtype=np.int32, mode="r",
+            shape=(header["links"],)
+        ) if header["links"] else np.zeros(0, dtype=np.int32)
+        return cls(pages, offsets, targets)
+
+    @property
+    def index(self):
+        """
+        Dictionary from page name to page id, built on first use.
+        """
+        if self._index is None:
+            self._index = {page: i for i, page in enumerate(self.pages)}
+        return self._index
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __contains__(self, page):
+        return page in self.index
+
+    def __getitem__(self, page):
+        i = self.index[page]
+        return set(
+            self.pages[link]
+            for link in self.targets[self.offsets[i]:self.offsets[i + 1]].tolist()
+        )
+
+    def sample(self, damping_factor, n, seed=None):
+        """
+        Return PageRank values for each page by sampling `n` pages with a
+        random surfer that reads the links straight from the link arrays.
+        """
+        rng = np.random.default_rng(seed)
+        visits = random_surfer(
+            self.offsets, self.targets, damping_factor, n, rng, in_memory=False
+        )
+        counts = np.bincount(visits, minlength=len(self.pages))
+        return {page: int(count) / n for page, count in zip(self.pages, counts)}
+
+    def iterate(self, damping_factor, tolerance=0.001):
+        """
+        Return PageRank values for each page by iteratively updating them
+        until no value changes by more than `tolerance`, streaming through
+        the link arrays a block at a time so that only the rank vectors
+        have to fit in memory.
+        """
+        numPages = len(self.pages)
+        degrees = np.diff(self.offsets)
+        dangling = degrees == 0
+        ranks = np.full(numPages, 1 / numPages)
+
+        while True:
+            shares = np.divide(ranks, degrees, out=np.zeros(numPages), where=~dangling)
+            nextRanks = np.zeros(numPages)
+            for first, last in self._blocks():
+                weights = np.repeat(shares[first:last], degrees[first:last])
+                links = self.targets[self.offsets[first]:self.offsets[last]]
+                nextRanks += np.bincount(links, weights=weights, minlength=numPages)
+            danglingShare = ranks[dangling].sum() / numPages
+            nextRanks = damping_factor * (nextRanks + danglingShare) \
+                + (1 - damping_factor) / numPages
+            converged = np.abs(nextRanks - ranks).max() <= tolerance
+            ranks = nextRanks
+            if converged:
+                break
+        return {page: float(rank) for page, rank in zip(self.pages, ranks)}
+
+    def _blocks(self):
+        """
+        Yield (first, last) ranges of pages holding about BLOCK links each.
+        """
+        numPages = len(self.pages)
+        first = 0
+        while first < numPages:
+            last = int(np.searchsorted(self.offsets, self.offsets[first] + BLOCK, side="right"))
+            last = min(max(last - 1, first + 1), numPages)
+            yield first, last
+            first = last
+
+
+def write_compact(directory, pages, links):
+    """
+    Write a compact corpus to `directory` from the list of page names
+    `pages` and an iterable `links` giving, for every page in order, the
+    ids of the pages it links to. Only one page's links are held in
+    memory at a time; the header is written last, so an interrupted
+    write is never opened as a corpus.
+    """
+    os.makedirs(directory, exist_ok=True)
+    headerPath = os.path.join(directory, HEADER_NAME)
+    if os.path.exists(headerPath):
+        os.remove(headerPath)
+
+    with open(os.path.join(directory, PAGES_NAME), "w", encoding="utf-8") as f:
+        for page in pages:
+            if "\n" in page:
+                raise ValueError(f"page names cannot contain newlines: {page!r}")
+            f.write(page + "\n")
+
+    offsets = array("q", [0])
+    numLinks = 0
+    with open(os.path.join(directory, TARGETS_NAME), "wb") as f:
+        for targets in links:
+            targets = array("i", sorted(targets))
+            targets.tofile(f)
+            numLinks += len(targets)
+            offsets.append(numLinks)
+    if len(offsets) != len(pages) + 1:
+        raise ValueError("expected the links of every page")
+    with open(os.path.join(directory, OFFSETS_NAME), "wb") as f:
+        offsets.tofile(f)
+
+    with open(headerPath, "w") as f:
+        json.dump({"version": VERSION, "pages": len(pages), "links": numLinks}, f)
+
+
+def save_compact(corpus, directory):
+    """
+    Write the corpus dictionary `corpus` to `directory` as a compact corpus.
+    Links to pages outside the corpus are dropped.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    write_compact(directory, pages, (
+        set(index[link] for link in corpus[page] if link in index and link != page)
+        for page in pages
+    ))
+
+
+def crawl_compact(source, directory):
+    """
+    Parse the directory of HTML pages `source` one page at a time and write
+    it to `directory` as a compact corpus, without ever building the
+    corpus dictionary.
+    """
+    pages = sorted(
+        sys.intern(filename) for filename in os.listdir(source)
+        if filename.endswith(".html")
+    )
+    index = {page: i for i, page in enumerate(pages)}
+    write_compact(directory, pages, (
+        set(index[link] for link in parse_page(os.path.join(source, page))
+            if link in index and link != page)
+        for page in pages
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a directory of HTML pages into a compact corpus."
+    )
+    parser.add_argument("source", help="directory of HTML pages")
+    parser.add_argument("directory", help="directory to write the compact corpus to")
+    args = parser.parse_args()
+
+    crawl_compact(args.source, args.directory)
+    corpus = CompactCorpus.open(args.directory)
+    print(f"Wrote {len(corpus)} pages and {len(corpus.targets)} links to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Bump when the index layout changes, so that old indexes are rebuilt
+VERSION = 1
+INDEX_NAME = "links.index"
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def index_path(directory):
+    """
+    Return the path of the link index kept for the corpus in `directory`.
+    """
+    return os.path.join(directory, INDEX_NAME)
+
+
+def parse_page(path):
+    """
+    Return the sorted list of every link target found in the HTML file
+    at `path`.
+    """
+    with open(path) as f:
+        return sorted(set(LINK.findall(f.read())))
+
+
+def load_index(path):
+    """
+    Return the entries of the link index at `path`, mapping each filename
+    to its size, modification time and links, or an empty dict if there is
+    no usable index.
+    """
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != VERSION:
+        return {}
+    return index.get("files", {})
+
+
+def save_index(path, entries):
+    """
+    Write the link index `entries` to `path`, replacing any previous index
+    in one step so a crash never leaves a half-written file.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": VERSION, "files": entries}, f, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def crawl_cached(directory, threads=None, rebuild=False):
+    """
+    Parse a directory of HTML pages like pagerank.crawl, but keep the links
+    found in every page in an on-disk index keyed by filename, size and
+    modification time. Only new or changed pages are read again, on a pool
+    of `threads` threads; pages that were removed are dropped from the index.
+    `rebuild` ignores any existing index.
+
+    Return the corpus dictionary and a dictionary of statistics: the
+    number of pages, how many were parsed, and how many were removed.
+    """
+    path = index_path(directory)
+    entries = {} if rebuild else load_index(path)
+
+    current = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".html") and entry.is_file():
+                stat = entry.stat()
+                current[entry.name] = [stat.st_size, stat.st_mtime_ns]
+
+    removed = [filename for filename in entries if filename not in current]
+    for filename in removed:
+        del entries[filename]
+
+    changed = [
+        filename for filename, stamp in current.items()
+        if filename not in entries or entries[filename]["stamp"] != stamp
+    ]
+    if changed:
+        with ThreadPoolExecutor(threads) as pool:
+            paths = [os.path.join(directory, filename) for filename in changed]
+            for filename, links in zip(changed, pool.map(parse_page, paths)):
+                entries[filename] = {"stamp": current[filename], "links": links}
+
+    if changed or removed:
+        try:
+            save_index(path, entries)
+        except OSError:
+            # A read-only corpus directory only costs us the cache
+            pass
+
+    # The index keeps every link as written, so links to removed pages are
+    # pruned here and links to pages added later are picked up again
+    pages = {}
+    for filename, entry in entries.items():
+        pages[filename] = set(
+            link for link in entry["links"]
+            if link in entries and link != filename
+        )
+
+    stats = {"pages": len(pages), "parsed": len(changed), "removed": len(removed)}
+    return pages, stats
+
+
+def read_links(path):
+    """
+    Return the corpus dictionary stored in the link list at `path`.
+    """
+    corpus = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if fields[0]:
+                corpus[fields[0]] = set(fields[1:])
+    for page in corpus:
+        corpus[page] = set(link for link in corpus[page] if link in corpus and link != page)
+    return corpus
@@ -0,0 +1,354 @@
+import collections
+
+import numpy as np
+from scipy import sparse
+
+TOLERANCE = 0.001
+MAX_ITERATIONS = 1000
+
+
+def link_matrix(corpus):
+    """
+    Build the link structure of `corpus` once, as a sparse matrix.
+
+    Return the list of pages, a column-stochastic CSR matrix whose entry
+    (i, j) is the probability of following a link from page j to page i,
+    and a boolean array marking the pages that have no links at all.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+
+    rows = []
+    cols = []
+    data = []
+    for page in pages:
+        links = [index[link] for link in corpus[page] if link in index]
+        for link in links:
+            rows.append(link)
+            cols.append(index[page])
+            data.append(1 / len(links))
+
+    numPages = len(pages)
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float64),
+         (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(numPages, numPages)
+    )
+    dangling = np.asarray(matrix.sum(axis=0)).ravel() == 0
+    return pages, matrix, dangling
+
+
+def power_iteration(matrix, dangling, damping_factor,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return the PageRank vector of the link matrix by repeated sparse
+    matrix-vector products, starting from the uniform distribution.
+
+    A page with no links is treated as linking to every page, which is
+    applied as a single correction term per iteration rather than as
+    N extra edges. Iteration stops once no rank changes by more than
+    `tolerance`, or after `max_iterations` sweeps.
+    """
+    numPages = matrix.shape[0]
+    ranks = np.full(numPages, 1 / numPages)
+    teleport = (1 - damping_factor) / numPages
+
+    for i in range(max_iterations):
+        danglingMass = ranks[dangling].sum() / numPages
+        nextRanks = damping_factor * (matrix @ ranks + danglingMass) + teleport
+        converged = np.abs(nextRanks - ranks).max() <= tolerance
+        ranks = nextRanks
+        if converged:
+            break
+    return ranks
+
+
+def matrix_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page by power iteration over a sparse
+    link matrix built once from the corpus.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks = power_iteration(matrix, dangling, damping_factor, tolerance, max_iterations)
+    return {page: float(rank) for page, rank in zip(pages, ranks)}
+
+
+def apply_link_delta(corpus, added=(), removed=(), removed_pages=()):
+    """
+    Return a copy of `corpus` with the (page, link) pairs in `added` and
+    `removed` added and removed, and the pages in `removed_pages` deleted
+    along with every link to them. Pages named in `added` that are not
+    in the corpus yet are created.
+    """
+    updated = {page: set(links) for page, links in corpus.items()}
+    for page, link in added:
+        updated.setdefault(page, set())
+        updated.setdefault(link, set())
+        if link != page:
+            updated[page].add(link)
+    for page, link in removed:
+        if page in updated:
+            updated[page].discard(link)
+    for page in removed_pages:
+        updated.pop(page, None)
+    if removed_pages:
+        gone = set(removed_pages)
+        for page in updated:
+            updated[page] -= gone
+    return updated
+
+
+class IncrementalPageRank():
+    """
+    PageRank of a corpus that is kept up to date as links and pages are
+    added and removed, by redoing only the work near each change.
+
+    With pages without links spread over all pages, the PageRank vector is
+    proportional to the solution y of the linear system (I - dM) y = 1,
+    where M is the link matrix with the columns of those pages left empty.
+    The index keeps y, the links of every page and the residual
+    r = 1 - (I - dM) y. Changing the links of a page only changes the
+    residual of the pages it linked to before and after, and the residual
+    is then pushed out from there (Gauss-Southwell iteration) until no
+    page holds more than its share of `tolerance`, so the work done
+    follows the part of the graph the change actually affects.
+    """
+    def __init__(self, corpus, damping_factor, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS):
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+        self.pages, matrix, dangling = link_matrix(corpus)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        self.links = [set() for page in self.pages]
+        self.linkedFrom = [set() for page in self.pages]
+        for page, i in self.index.items():
+            for link in corpus[page]:
+                if link in self.index and link != page:
+                    self.links[i].add(self.index[link])
+                    self.linkedFrom[self.index[link]].add(i)
+        self.live = [True] * len(self.pages)
+        self.numLive = len(self.pages)
+        self.pushes = 0
+
+        # Solve the whole system once by Jacobi iteration
+        y = np.ones(len(self.pages))
+        for i in range(max_iterations):
+            residual = 1 - y + damping_factor * (matrix @ y)
+            y += residual
+            if np.abs(residual).max() <= self._threshold(y.sum()):
+                break
+        self.y = y.tolist()
+        self.residual = (1 - y + damping_factor * (matrix @ y)).tolist()
+        self.total = float(y.sum())
+
+    def _threshold(self, total):
+        """
+        Return the largest residual a page may keep, so that the residuals
+        of all live pages add up to at most `tolerance` of the total mass.
+        """
+        return self.tolerance * total / max(self.numLive, 1)
+
+    def ranks(self):
+        """
+        Return the current PageRank values in a dictionary where keys are
+        page names, and values are their PageRank value. All PageRank
+        values sum to 1.
+        """
+        total = sum(y for y, live in zip(self.y, self.live) if live)
+        return {
+            page: self.y[i] / total
+            for i, page in enumerate(self.pages) if self.live[i]
+        }
+
+    def update(self, added=(), removed=(), removed_pages=()):
+        """
+        Add the (page, link) pairs in `added`, remove those in `removed`
+        and delete the pages in `removed_pages` along with every link to
+        them, creating pages named in `added` that do not exist yet, then
+        bring the ranks up to date.
+
+        Return the number of pushes it took.
+        """
+        changed = {}
+        for page, link in added:
+            i = self._page(page)
+            j = self._page(link)
+            if i != j:
+                changed.setdefault(i, set(self.links[i])).add(j)
+        for page, link in removed:
+            if page in self.index and link in self.index:
+                i = self.index[page]
+                changed.setdefault(i, set(self.links[i])).discard(self.index[link])
+        gone = set()
+        for page in removed_pages:
+            if page not in self.index or not self.live[self.index[page]]:
+                continue
+            i = self.index[page]
+            gone.add(i)
+            for source in self.linkedFrom[i]:
+                changed.setdefault(source, set(self.links[source])).discard(i)
+            changed[i] = set()
+            self.live[i] = False
+            self.numLive -= 1
+            # The page no longer contributes a unit of rank of its own
+            self.residual[i] -= 1
+        if gone:
+            # Links added above to pages deleted in the same update go too
+            for links in changed.values():
+                links -= gone
+
+        touched = set(changed)
+        for i, links in changed.items():
+            touched.update(self._set_links(i, links))
+        return self._push(touched)
+
+    def _page(self, page):
+        """
+        Return the index of `page`, adding it as a new page without links
+        if it is not in the corpus yet, or bringing it back if an earlier
+        update deleted it.
+        """
+        if page in self.index:
+            i = self.index[page]
+            if not self.live[i]:
+                self.live[i] = True
+                self.numLive += 1
+                self.residual[i] += 1
+            return i
+        i = len(self.pages)
+        self.pages.append(page)
+        self.index[page] = i
+        self.links.append(set())
+        self.linkedFrom.append(set())
+        self.live.append(True)
+        self.numLive += 1
+        self.y.append(0.0)
+        self.residual.append(1.0)
+        return i
+
+    def _set_links(self, i, links):
+        """
+        Replace the links of page index `i` with `links`, adjusting the
+        residual of the pages it linked to before and after, and return
+        those pages.
+        """
+        old = self.links[i]
+        share = self.damping_factor * self.y[i]
+        for j in old:
+            self.residual[j] -= share / len(old)
+            self.linkedFrom[j].discard(i)
+        for j in links:
+            self.residual[j] += share / len(links)
+            self.linkedFrom[j].add(i)
+        self.links[i] = links
+        return old | links
+
+    def _push(self, touched):
+        """
+        Push residual out of the pages in `touched`, and of every page it
+        reaches, until no page holds more than its threshold. Return the
+        number of pushes.
+        """
+        threshold = self._threshold(self.total)
+        y = self.y
+        residual = self.residual
+        queue = collections.deque(i for i in touched if abs(residual[i]) > threshold)
+        queued = set(queue)
+        pushes = 0
+        while queue:
+            i = queue.popleft()
+            queued.discard(i)
+            r = residual[i]
+            if abs(r) <= threshold:
+                continue
+            y[i] += r
+            residual[i] = 0.0
+            self.total += r
+            pushes += 1
+            links = self.links[i]
+            if not links:
+                continue
+            share = self.damping_factor * r / len(links)
+            for j in links:
+                residual[j] += share
+                if j not in queued and abs(residual[j]) > threshold:
+                    queue.append(j)
+                    queued.add(j)
+        self.pushes += pushes
+        return pushes
+
+
+def teleport_matrix(pages, seed_sets):
+    """
+    Return an N x K matrix whose column k is the uniform distribution over
+    the pages of `seed_sets[k]`.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    teleport = np.zeros((len(pages), len(seed_sets)))
+    for k, seedSet in enumerate(seed_sets):
+        rows = []
+        for page in seedSet:
+            if page not in index:
+                raise ValueError(f"{page} is not a page of the corpus")
+            rows.append(index[page])
+        if not rows:
+            raise ValueError("seed sets must not be empty")
+        teleport[rows, k] = 1 / len(set(rows))
+    return teleport
+
+
+def batched_power_iteration(matrix, dangling, teleport, damping_factor,
+                            tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return the N x K matrix of personalized PageRank vectors, one per
+    column of the teleport matrix, found by iterating all of them together
+    against the one sparse link matrix.
+
+    The surfer jumps to a page drawn from its column of `teleport`, both
+    with probability 1 - `damping_factor` and whenever it reaches a page
+    with no links. A column stops being updated once none of its ranks
+    changes by more than `tolerance`.
+    """
+    ranks = teleport.copy()
+    active = np.arange(teleport.shape[1])
+
+    for i in range(max_iterations):
+        current = ranks[:, active]
+        jumps = teleport[:, active]
+        danglingMass = current[dangling].sum(axis=0)
+        nextRanks = damping_factor * (matrix @ current + jumps * danglingMass) \
+            + (1 - damping_factor) * jumps
+        converged = np.abs(nextRanks - current).max(axis=0) <= tolerance
+        ranks[:, active] = nextRanks
+        active = active[~converged]
+        if not len(active):
+            break
+    return ranks
+
+
+def personalized_pagerank(corpus, damping_factor, seed_sets,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return topic-specific PageRank values for every set of pages in
+    `seed_sets`, where the random surfer only ever jumps to pages of the
+    seed set. All seed sets are solved together over one link matrix.
+
+    Return a list with one dictionary per seed set, in order, where keys
+    are page names, and values are their estimated PageRank value.
+    Raises ValueError if a seed set is empty or names an unknown page.
+    """
+    seed_sets = list(seed_sets)
+    pages, matrix, dangling = link_matrix(corpus)
+    teleport = teleport_matrix(pages, seed_sets)
+    ranks = batched_power_iteration(
+        matrix, dangling, teleport, damping_factor, tolerance, max_iterations
+    )
+    return [
+        {page: float(rank) for page, rank in zip(pages, column)}
+        for column in ranks.T
+    ]
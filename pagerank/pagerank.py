@@ -1,27 +1,133 @@
+import argparse
 import os
 import random
 import re
 import sys
 
+from compact import CompactCorpus
+from crawler import crawl_cached, read_links
+from matrix import matrix_pagerank, personalized_pagerank, MAX_ITERATIONS, TOLERANCE
+from solvers import solve_pagerank, SOLVERS, STOPPING
+from sampling import fast_sample_pagerank, multi_chain_pagerank
+
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Compute PageRank for a corpus.")
+    parser.add_argument("corpus", help="directory of HTML pages, compact corpus "
+                                       "directory, or link list file")
+    parser.add_argument(
+        "--crawler", choices=["plain", "cached"], default="plain",
+        help="read every page, or only pages changed since the last cached crawl"
+    )
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads used by the cached crawler")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="ignore the cached crawler's link index")
+    parser.add_argument(
+        "--engine", choices=["dict", "matrix"] + list(SOLVERS), default="dict",
+        help="implementation used for the iterative PageRank"
+    )
+    parser.add_argument("--stopping", choices=list(STOPPING), default="max",
+                        help="stop on the largest change of a rank, or on the L1 residual")
+    parser.add_argument("--trace", action="store_true",
+                        help="print the residual and time of every iteration")
+    parser.add_argument(
+        "--sampler", choices=["dict", "fast", "chains"], default="dict",
+        help="implementation used for the sampled PageRank"
+    )
+    parser.add_argument("--chains", type=int, default=4,
+                        help="independent chains run by the chains sampler")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--stderr", type=float, default=None,
+                        help="stop the chains sampler once every standard error is this small")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+    parser.add_argument("--topic", action="append", default=[], metavar="PAGES",
+                        help="comma-separated seed pages of a personalized PageRank "
+                             "(may be repeated)")
+    args = parser.parse_args()
+    if args.max_iterations < 1:
+        parser.error("--max-iterations must be at least 1")
+    if os.path.exists(os.path.join(args.corpus, "compact.json")):
+        if args.engine != "dict" or args.sampler != "dict" or args.topic:
+            parser.error("a compact corpus only supports the dict sampler and engine")
+        corpus = CompactCorpus.open(args.corpus)
+    elif os.path.isfile(args.corpus):
+        corpus = read_links(args.corpus)
+    elif args.crawler == "cached":
+        corpus, stats = crawl_cached(args.corpus, args.threads, args.rebuild_index)
+        print(f"Crawled {stats['pages']} pages "
+              f"({stats['parsed']} parsed, {stats['removed']} removed)")
+    else:
+        corpus = crawl(args.corpus)
 
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
+    if args.sampler == "fast":
+        ranks = fast_sample_pagerank(corpus, DAMPING, args.samples, args.seed)
+    elif args.sampler == "chains":
+        try:
+            ranks, diagnostics = multi_chain_pagerank(
+                corpus, DAMPING, args.samples, args.chains, args.processes,
+                args.stderr, args.seed
+            )
+        except ValueError as e:
+            sys.exit(e)
+    else:
+        random.seed(args.seed)
+        ranks = sample_pagerank(corpus, DAMPING, args.samples)
 
-    ranks = iterate_pagerank(corpus, DAMPING)
+    if args.sampler == "chains":
+        print(f"PageRank Results from Sampling "
+              f"({args.chains} chains, n = {diagnostics['samples']})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f} "
+                  f"(stderr {diagnostics['stderr'][page]:.4f}, "
+                  f"R-hat {diagnostics['rhat'][page]:.3f})")
+    else:
+        print(f"PageRank Results from Sampling (n = {args.samples})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+
+    if args.engine == "matrix":
+        ranks = matrix_pagerank(corpus, DAMPING, args.tolerance, args.max_iterations)
+    elif args.engine in SOLVERS:
+        ranks, trace = solve_pagerank(
+            corpus, DAMPING, args.engine, args.stopping, args.tolerance,
+            args.max_iterations, print_iteration if args.trace else None
+        )
+        if trace:
+            print(f"Stopped after {len(trace)} iterations "
+                  f"(L1 residual {trace[-1][1]:.2e}, {trace[-1][2]:.3f}s)")
+    else:
+        ranks = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
+    if args.topic:
+        seedSets = [topic.split(",") for topic in args.topic]
+        try:
+            results = personalized_pagerank(
+                corpus, DAMPING, seedSets, args.tolerance, args.max_iterations
+            )
+        except ValueError as e:
+            sys.exit(e)
+        for seedSet, ranks in zip(seedSets, results):
+            print(f"Personalized PageRank Results (seed set: {', '.join(seedSet)})")
+            for page in sorted(ranks):
+                print(f"  {page}: {ranks[page]:.4f}")
+
+
+def print_iteration(iteration, residual, elapsed):
+    """
+    Print the progress of one iteration of a PageRank solver.
+    """
+    print(f"  iteration {iteration}: L1 residual {residual:.2e} ({elapsed:.3f}s)")
+
 
 def crawl(directory):
     """
@@ -88,7 +194,13 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a CompactCorpus, which is sampled straight from
+    its link arrays.
     """
+    if isinstance(corpus, CompactCorpus):
+        return corpus.sample(damping_factor, n, random.getrandbits(64))
+
     listOfPages = []
     dictToReturn = {}
     allPages = corpus.keys()
@@ -118,7 +230,13 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a CompactCorpus, which is iterated block by block
+    over its link arrays.
     """
+    if isinstance(corpus, CompactCorpus):
+        return corpus.iterate(damping_factor)
+
     numCorpus = len(corpus)
     allPages = corpus.keys()
 
@@ -134,11 +252,9 @@ def iterate_pagerank(corpus, damping_factor):
         currentPageRank[page] = 1/numCorpus
         nextPageRank[page] = 1/numCorpus
 
-        # If the page has no links
-        if NumLinks[page] == 0:
-            for otherPages in allPages:
-                corpus[page].add(otherPages)
-            NumLinks[page] = numCorpus
+    # A page with no links is treated as linking to every page. Rather than
+    # adding those N edges, its rank is spread evenly over all pages below
+    danglingPages = [page for page in allPages if NumLinks[page] == 0]
 
     # Need to know the list of pages from which we can get to the current page
     for parent in allPages:
@@ -149,9 +265,10 @@ def iterate_pagerank(corpus, damping_factor):
 
     # Iterating code
     while True:
+        danglingShare = sum(nextPageRank[page] for page in danglingPages)/numCorpus
         for page in allPages:
             currentPageRank[page] = nextPageRank[page]
-            pRValue = constVal
+            pRValue = constVal + danglingShare
             for parent in listOfParents[page]:
                 pRValue += currentPageRank[parent]/NumLinks[parent]
             nextPageRank[page] = damping_factor * pRValue
@@ -0,0 +1,211 @@
+import math
+import multiprocessing
+
+import numpy as np
+
+# Number of random draws generated at a time by the random surfer
+CHUNK = 65536
+
+# Number of steps every chain takes between convergence checks
+ROUND = 10000
+
+# Link lists and damping factor shared by the chain workers. They are set
+# before the pool is created so that forked workers inherit them
+# copy-on-write instead of receiving a pickled copy with every round.
+links = None
+
+
+def link_arrays(corpus):
+    """
+    Return the sorted list of pages and the links of `corpus` in
+    compressed-sparse-row form: the links of page i are the page indices
+    targets[offsets[i]:offsets[i + 1]].
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    targets = []
+    for i, page in enumerate(pages):
+        links = sorted(index[link] for link in corpus[page] if link in index)
+        targets.extend(links)
+        offsets[i + 1] = len(targets)
+    return pages, offsets, np.array(targets, dtype=np.int64)
+
+
+def random_surfer(offsets, targets, damping_factor, n, rng, start=None,
+                  in_memory=True):
+    """
+    Return the page indices visited by a random surfer taking `n` samples.
+    Without `start` the first sample is a page chosen at random; otherwise
+    the surfer continues a chain that was last at page `start`.
+
+    Each step is O(1): with probability `damping_factor` the surfer follows
+    one of the current page's links, picked by indexing into the link array;
+    otherwise, or when the page has no links, it jumps to any page.
+
+    The link arrays are copied to lists first, which is fastest, unless
+    `in_memory` is false, in which case they are read in place, as for
+    memory-mapped arrays that are larger than memory.
+    """
+    if in_memory:
+        offsets = offsets.tolist()
+        targets = targets.tolist()
+    return _walk(offsets, targets, damping_factor, n, rng, start)
+
+
+def _walk(offsets, targets, damping_factor, n, rng, start):
+    """
+    Run random_surfer over link arrays already converted to lists.
+    """
+    numPages = len(offsets) - 1
+    visits = np.empty(n, dtype=np.int64)
+    page = start
+
+    done = 0
+    while done < n:
+        size = min(CHUNK, n - done)
+        follows = (rng.random(size) < damping_factor).tolist()
+        picks = rng.random(size).tolist()
+        jumps = rng.integers(numPages, size=size).tolist()
+        chunk = visits[done:done + size]
+        for i in range(size):
+            if page is None:
+                page = jumps[i]
+            else:
+                first = offsets[page]
+                degree = offsets[page + 1] - first
+                if follows[i] and degree:
+                    page = targets[first + int(picks[i] * degree)]
+                else:
+                    page = jumps[i]
+            chunk[i] = page
+        done += size
+    return visits
+
+
+def fast_sample_pagerank(corpus, damping_factor, n, seed=None):
+    """
+    Return PageRank values for each page by sampling `n` pages with a
+    random surfer that precomputes the link arrays once, so every sample
+    costs O(1), and tallies the visits with a single bincount.
+
+    `seed` makes the result reproducible. Return a dictionary where keys
+    are page names, and values are their estimated PageRank value (a value
+    between 0 and 1). All PageRank values should sum to 1.
+    """
+    pages, offsets, targets = link_arrays(corpus)
+    rng = np.random.default_rng(seed)
+    visits = random_surfer(offsets, targets, damping_factor, n, rng)
+    counts = np.bincount(visits, minlength=len(pages))
+    return {page: int(count) / n for page, count in zip(pages, counts)}
+
+
+def multi_chain_pagerank(corpus, damping_factor, n, chains=4, processes=None,
+                         tolerance=None, seed=None):
+    """
+    Return PageRank values for each page by running `chains` independent
+    random surfers side by side, spread over a pool of `processes` forked
+    workers (one per CPU by default), and merging their visit counts.
+
+    The chains take at most `n` samples between them. They advance in
+    rounds of ROUND steps each; if `tolerance` is given, sampling stops
+    early once the standard error of every page's estimate is within it.
+
+    Return a pair (ranks, diagnostics). `ranks` maps page names to their
+    estimated PageRank value; `diagnostics` holds the number of samples
+    and rounds taken, whether the tolerance was met, and per page the
+    standard error of the estimate across chains ("stderr") and the
+    Gelman-Rubin potential scale reduction factor ("rhat").
+    """
+    global links
+    if chains < 2:
+        raise ValueError("at least two chains are needed to estimate the error")
+    if n < chains:
+        raise ValueError(f"{n} samples cannot be shared between {chains} chains")
+
+    pages, offsets, targets = link_arrays(corpus)
+    links = (offsets.tolist(), targets.tolist(), damping_factor)
+    generators = [
+        np.random.default_rng(child)
+        for child in np.random.SeedSequence(seed).spawn(chains)
+    ]
+    positions = [None] * chains
+    counts = np.zeros((chains, len(pages)), dtype=np.int64)
+    budget = n // chains
+    rounds = 0
+    converged = False
+
+    pool = None
+    if processes != 1 and "fork" in multiprocessing.get_all_start_methods():
+        pool = multiprocessing.get_context("fork").Pool(min(processes or chains, chains))
+    try:
+        taken = 0
+        while taken < budget and not converged:
+            steps = min(ROUND, budget - taken)
+            tasks = [
+                (generators[k], positions[k], steps) for k in range(chains)
+            ]
+            results = pool.map(_advance, tasks) if pool else map(_advance, tasks)
+            for k, (rng, position, visits) in enumerate(results):
+                generators[k] = rng
+                positions[k] = position
+                counts[k] += visits
+            taken += steps
+            rounds += 1
+            if tolerance is not None:
+                converged = chain_stderr(counts).max() <= tolerance
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    samples = int(counts.sum())
+    ranks = counts.sum(axis=0) / samples
+    diagnostics = {
+        "samples": samples,
+        "rounds": rounds,
+        "converged": converged,
+        "stderr": dict(zip(pages, chain_stderr(counts).tolist())),
+        "rhat": dict(zip(pages, gelman_rubin(counts).tolist())),
+    }
+    return {page: float(rank) for page, rank in zip(pages, ranks)}, diagnostics
+
+
+def _advance(task):
+    """
+    Advance one chain by a number of steps, returning its generator, the
+    page it stopped on and its visit counts for those steps.
+    """
+    rng, position, steps = task
+    offsets, targets, damping_factor = links
+    visits = _walk(offsets, targets, damping_factor, steps, rng, position)
+    counts = np.bincount(visits, minlength=len(offsets) - 1)
+    return rng, int(visits[-1]), counts
+
+
+def chain_stderr(counts):
+    """
+    Return the standard error of every page's merged estimate, from the
+    spread of the per-chain estimates in the chains x pages `counts`.
+    """
+    estimates = counts / counts.sum(axis=1, keepdims=True)
+    return estimates.std(axis=0, ddof=1) / math.sqrt(len(counts))
+
+
+def gelman_rubin(counts):
+    """
+    Return the Gelman-Rubin potential scale reduction factor of every
+    page's visit indicator, from the chains x pages `counts`. Values close
+    to 1 mean the chains agree; pages that no chain (or every chain)
+    always visits get exactly 1.
+    """
+    steps = counts.sum(axis=1, keepdims=True)
+    n = steps.min()
+    estimates = counts / steps
+    within = (estimates * (1 - estimates) * n / max(n - 1, 1)).mean(axis=0)
+    between = n * estimates.var(axis=0, ddof=1)
+    pooled = (n - 1) / n * within + between / n
+    rhat = np.ones(counts.shape[1])
+    varying = within > 0
+    rhat[varying] = np.sqrt(pooled[varying] / within[varying])
+    return rhat
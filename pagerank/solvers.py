@@ -0,0 +1,199 @@
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve_triangular
+
+from matrix import link_matrix, MAX_ITERATIONS, TOLERANCE
+
+# Number of power iterations between two extrapolation steps
+EXTRAPOLATION_PERIOD = 10
+
+
+def max_change(ranks, nextRanks):
+    """
+    Stopping measure of iterate_pagerank: the largest change of any rank.
+    """
+    return np.abs(nextRanks - ranks).max()
+
+
+def l1_change(ranks, nextRanks):
+    """
+    Stopping measure on the L1 residual, the total change of all ranks.
+    """
+    return np.abs(nextRanks - ranks).sum()
+
+
+STOPPING = {
+    "max": max_change,
+    "l1": l1_change,
+}
+
+
+class PowerSolver():
+    """
+    Plain power iteration: every sweep multiplies the rank vector by the
+    link matrix, with pages without links spread over all pages and the
+    random jump added on top.
+    """
+    def __init__(self, matrix, dangling, damping_factor):
+        self.matrix = matrix
+        self.dangling = dangling
+        self.damping_factor = damping_factor
+        self.numPages = matrix.shape[0]
+
+    def step(self, ranks):
+        """
+        Return the rank vector after one sweep from `ranks`.
+        """
+        danglingMass = ranks[self.dangling].sum() / self.numPages
+        return self.damping_factor * (self.matrix @ ranks + danglingMass) \
+            + (1 - self.damping_factor) / self.numPages
+
+
+class GaussSeidelSolver(PowerSolver):
+    """
+    Gauss-Seidel iteration on the linear system (I - dM) x = b, where b
+    holds the random jump and the dangling mass of the previous sweep.
+    Every page uses the ranks already updated earlier in the same sweep,
+    which is one forward triangular solve per sweep.
+    """
+    def __init__(self, matrix, dangling, damping_factor):
+        super().__init__(matrix, dangling, damping_factor)
+        system = sparse.identity(self.numPages, format="csr") - damping_factor * matrix
+        self.lower = sparse.tril(system, format="csr")
+        self.upper = sparse.triu(system, k=1, format="csr")
+
+    def step(self, ranks):
+        danglingMass = ranks[self.dangling].sum() / self.numPages
+        rhs = self.damping_factor * danglingMass \
+            + (1 - self.damping_factor) / self.numPages - self.upper @ ranks
+        nextRanks = spsolve_triangular(self.lower, rhs, lower=True)
+        # The dangling mass lags one sweep behind, so the total can drift
+        return nextRanks / nextRanks.sum()
+
+
+class AitkenSolver(PowerSolver):
+    """
+    Power iteration with Aitken delta-squared extrapolation, applied to
+    every page separately from the last three iterates once every
+    EXTRAPOLATION_PERIOD sweeps.
+    """
+    history = 3
+
+    def __init__(self, matrix, dangling, damping_factor):
+        super().__init__(matrix, dangling, damping_factor)
+        self.iterates = []
+        self.sweeps = 0
+
+    def step(self, ranks):
+        nextRanks = super().step(ranks)
+        self.sweeps += 1
+        self.iterates = (self.iterates + [nextRanks])[-self.history:]
+        if self.sweeps % EXTRAPOLATION_PERIOD == 0 and len(self.iterates) == self.history:
+            nextRanks = self.extrapolate()
+            self.iterates = [nextRanks]
+        return nextRanks
+
+    def extrapolate(self):
+        """
+        Return the extrapolated rank vector, clipped to be non-negative and
+        rescaled to sum to 1.
+        """
+        x0, x1, x2 = self.iterates
+        denominator = x2 - 2 * x1 + x0
+        extrapolated = x2.copy()
+        usable = np.abs(denominator) > 1e-15
+        extrapolated[usable] = x0[usable] - (x1[usable] - x0[usable]) ** 2 / denominator[usable]
+        return _normalize(extrapolated, x2)
+
+
+class QuadraticSolver(AitkenSolver):
+    """
+    Power iteration with quadratic extrapolation (Kamvar et al.), which
+    removes the two next largest eigenvector components from the last four
+    iterates once every EXTRAPOLATION_PERIOD sweeps.
+    """
+    history = 4
+
+    def extrapolate(self):
+        x0, x1, x2, x3 = self.iterates
+        y = np.column_stack((x1 - x0, x2 - x0))
+        gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+        gamma1, gamma2, gamma3 = gamma[0], gamma[1], 1
+        extrapolated = (gamma1 + gamma2 + gamma3) * x1 + (gamma2 + gamma3) * x2 + gamma3 * x3
+        return _normalize(extrapolated, x3)
+
+
+def _normalize(extrapolated, fallback):
+    """
+    Return `extrapolated` clipped to be non-negative and rescaled to sum
+    to 1, or `fallback` if nothing usable is left.
+    """
+    extrapolated = np.clip(extrapolated, 0, None)
+    total = extrapolated.sum()
+    if not np.isfinite(total) or total <= 0:
+        return fallback
+    return extrapolated / total
+
+
+SOLVERS = {
+    "power": PowerSolver,
+    "gauss-seidel": GaussSeidelSolver,
+    "aitken": AitkenSolver,
+    "quadratic": QuadraticSolver,
+}
+
+
+def solve(matrix, dangling, damping_factor, method="power", stopping="max",
+          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, start=None,
+          callback=None):
+    """
+    Return the PageRank vector of the link matrix found with the solver
+    named `method` (one of SOLVERS), starting from `start` or from the
+    uniform distribution, and the trace of the iteration.
+
+    Iteration stops once the measure named `stopping` (one of STOPPING)
+    of the change between two iterates is within `tolerance`, or after
+    `max_iterations` sweeps. The trace is a list with one tuple
+    (iteration, L1 residual, seconds since the start) per sweep, each of
+    which is also passed to `callback` if given. With no sweeps allowed the
+    starting vector is returned as it is, with an empty trace.
+    """
+    solver = SOLVERS[method](matrix, dangling, damping_factor)
+    measure = STOPPING[stopping]
+    numPages = matrix.shape[0]
+    ranks = np.full(numPages, 1 / numPages) if start is None else start
+
+    trace = []
+    began = time.perf_counter()
+    for iteration in range(1, max_iterations + 1):
+        nextRanks = solver.step(ranks)
+        entry = (iteration, float(l1_change(ranks, nextRanks)), time.perf_counter() - began)
+        trace.append(entry)
+        if callback is not None:
+            callback(*entry)
+        converged = measure(ranks, nextRanks) <= tolerance
+        ranks = nextRanks
+        if converged:
+            break
+    return ranks, trace
+
+
+def solve_pagerank(corpus, damping_factor, method="power", stopping="max",
+                   tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                   callback=None):
+    """
+    Return PageRank values for each page found with the solver named
+    `method`, and the trace of the iteration, as for solve.
+
+    The values are in a dictionary where keys are page names, and values
+    are their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks, trace = solve(
+        matrix, dangling, damping_factor, method, stopping, tolerance,
+        max_iterations, callback=callback
+    )
+    return {page: float(rank) for page, rank in zip(pages, ranks)}, trace
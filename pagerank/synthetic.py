@@ -0,0 +1,94 @@
+import argparse
+import os
+import random
+
+
+def generate(pages, links=5, dangling=0.1, reciprocal=0.2, seed=None):
+    """
+    Return a synthetic corpus dictionary of `pages` pages grown by
+    preferential attachment, so that in-degrees follow a power law as on
+    the web.
+
+    Every new page links to `links` earlier pages, each picked with
+    probability proportional to its in-degree plus one, and each of those
+    pages links back with probability `reciprocal`. A fraction `dangling`
+    of the pages have their links removed.
+    """
+    rng = random.Random(seed)
+    names = [f"{i}.html" for i in range(pages)]
+    corpus = {name: set() for name in names}
+
+    # Every page appears once, plus once per link to it, so a uniform
+    # draw from this list picks pages in proportion to in-degree plus one
+    weighted = []
+    for i in range(pages):
+        targets = set()
+        if i:
+            while len(targets) < min(links, i):
+                targets.add(rng.choice(weighted))
+        for target in targets:
+            corpus[names[i]].add(names[target])
+            weighted.append(target)
+            if rng.random() < reciprocal:
+                corpus[names[target]].add(names[i])
+                weighted.append(i)
+        weighted.append(i)
+
+    for name in rng.sample(names, int(pages * dangling)):
+        corpus[name] = set()
+    return corpus
+
+
+def write_html(corpus, directory):
+    """
+    Write every page of `corpus` to `directory` as an HTML file holding
+    its links, in the form read by pagerank.crawl.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head><title>{page}</title></head>\n<body>\n")
+            for link in sorted(links):
+                f.write(f"<a href=\"{link}\">{link}</a>\n")
+            f.write("</body>\n</html>\n")
+
+
+def write_links(corpus, path):
+    """
+    Write `corpus` to `path` as a link list: one line per page, holding
+    the page followed by the pages it links to, separated by tabs, in the
+    form read by crawler.read_links.
+    """
+    with open(path, "w") as f:
+        for page in sorted(corpus):
+            f.write("\t".join([page] + sorted(corpus[page])) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic web corpus by preferential attachment."
+    )
+    parser.add_argument("path", help="directory of HTML pages, or link list file with --links-file")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--links", type=int, default=5,
+                        help="links from every new page to earlier pages")
+    parser.add_argument("--dangling", type=float, default=0.1,
+                        help="fraction of pages without links")
+    parser.add_argument("--reciprocal", type=float, default=0.2,
+                        help="probability that a linked page links back")
+    parser.add_argument("--links-file", action="store_true",
+                        help="write a link list instead of HTML pages")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    corpus = generate(args.pages, args.links, args.dangling, args.reciprocal, args.seed)
+    if args.links_file:
+        write_links(corpus, args.path)
+    else:
+        write_html(corpus, args.path)
+    numLinks = sum(len(links) for links in corpus.values())
+    print(f"Wrote {len(corpus)} pages and {numLinks} links to {args.path}")
+
+
+if __name__ == "__main__":
+    main()